@@ -1,18 +1,72 @@
-from cassandra.cluster import Cluster
+from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
 from cassandra.query import SimpleStatement
+import argparse
 import json
 import os
+import threading
 import time
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cassandra vector search example")
+    parser.add_argument("--contact-points", nargs="+", default=["127.0.0.1"])
+    parser.add_argument("--local-dc", default="datacenter1", help="Data center preferred by the load balancer")
+    parser.add_argument("--similarity", choices=["COSINE", "DOT_PRODUCT", "EUCLIDEAN"], default="COSINE",
+                        help="SAI vector similarity function")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max in-flight requests")
+    parser.add_argument("--queries", type=int, default=100, help="ANN queries run concurrently for throughput")
+    return parser.parse_args()
+
+def run_concurrent_queries(session, statement, query_vectors, concurrency):
+    # Async futures with a bounded in-flight window
+    window = threading.Semaphore(concurrency)
+    done = threading.Event()
+    lock = threading.Lock()
+    results = [None] * len(query_vectors)
+    remaining = [len(query_vectors)]
+
+    def finish(i, value):
+        results[i] = value
+        window.release()
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+
+    for i, query_vector in enumerate(query_vectors):
+        window.acquire()
+        try:
+            future = session.execute_async(statement, (query_vector,))
+        except Exception as exc:
+            # Failed before it was sent (e.g. NoHostAvailable): no callback will run
+            finish(i, exc)
+            continue
+        future.add_callbacks(
+            callback=lambda rows, i=i: finish(i, list(rows)),
+            errback=lambda exc, i=i: finish(i, exc)
+        )
+
+    if query_vectors:
+        done.wait()
+    return results
+
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to Cassandra...")
-    cluster = Cluster(['127.0.0.1'])
+    # Token-aware routing sends each request straight to a replica for its
+    # partition, preferring nodes in the local data center
+    profile = ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=args.local_dc))
+    )
+    cluster = Cluster(args.contact_points, execution_profiles={EXEC_PROFILE_DEFAULT: profile})
     session = cluster.connect()
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -39,8 +93,9 @@ def main():
     print("Table created.")
 
     # 3. Create Index (SAI)
-    session.execute("""
+    session.execute(f"""
         CREATE CUSTOM INDEX IF NOT EXISTS embedding_index ON items(embedding) USING 'StorageAttachedIndex'
+        WITH OPTIONS = {{ 'similarity_function': '{args.similarity}' }}
     """)
     # Also index category for filtering
     session.execute("""
@@ -52,12 +107,20 @@ def main():
     print(f"Inserting {len(data)} items...")
     prepared = session.prepare("INSERT INTO items (id, text, category, embedding) VALUES (?, ?, ?, ?)")
 
-    for item in data:
-        # embedding expects list of floats directly? Or string?
-        # Cassandra driver 3.29+ supports vector type directly as list/array
-        session.execute(prepared, (item["id"], item["text"], item["metadata"]["category"], item["vector"]))
-
-    print("Data inserted.")
+    # Cassandra driver 3.29+ supports vector type directly as list/array
+    start = time.perf_counter()
+    results = execute_concurrent_with_args(
+        session,
+        prepared,
+        ((item["id"], item["text"], item["metadata"]["category"], item["vector"]) for item in data),
+        concurrency=args.concurrency,
+        raise_on_first_error=False
+    )
+    failed = [result for success, result in results if not success]
+    for error in failed:
+        print(f"Insert failed: {error}")
+    elapsed = time.perf_counter() - start
+    print(f"Data inserted: {len(data) - len(failed)} rows in {elapsed:.2f}s.")
 
     # 5. Search (Vector Search via ANN)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
@@ -76,6 +139,14 @@ def main():
     for row in rows:
         print(f"ID: {row.id}, Text: {row.text}, Category: {row.category}")
 
+    # Concurrent ANN queries
+    query_vectors = [data[i % len(data)]["vector"] for i in range(args.queries)]
+    start = time.perf_counter()
+    results = run_concurrent_queries(session, stmt, query_vectors, args.concurrency)
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(result, Exception) for result in results)
+    print(f"{len(results)} concurrent ANN queries in {elapsed:.2f}s ({len(results) / elapsed:.0f} QPS, {errors} errors)")
+
     # 6. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
     # ANN search combined with filter
@@ -1,18 +1,62 @@
 import chromadb
 from chromadb.config import Settings
+import argparse
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Chroma example")
+    parser.add_argument("--mode", choices=["http", "persistent", "ephemeral"], default="http",
+                        help="Docker server over HTTP, or an embedded on-disk / in-memory client in this process")
+    parser.add_argument("--path", default="./chroma_db", help="Storage path for the persistent client")
+    parser.add_argument("--space", choices=["cosine", "l2", "ip"], default="l2")
+    parser.add_argument("--m", type=int, default=16, help="hnsw:M")
+    parser.add_argument("--construction-ef", type=int, default=100)
+    parser.add_argument("--search-ef", type=int, default=100)
+    parser.add_argument("--hnsw-batch-size", type=int, default=100,
+                        help="hnsw:batch_size, vectors buffered before they are added to the graph")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent add workers")
+    parser.add_argument("--queries", type=int, default=100, help="Queries timed for the latency benchmark")
+    return parser.parse_args()
+
+def connect(args):
+    if args.mode == "persistent":
+        # Embedded: no network hop, same API
+        return chromadb.PersistentClient(path=args.path)
+    if args.mode == "ephemeral":
+        return chromadb.EphemeralClient()
+    # For Docker server
+    return chromadb.HttpClient(host='localhost', port=8000)
+
+def add_chunked(client, collection, ids, embeddings, metadatas, documents, workers):
+    # The server rejects adds larger than its max batch size
+    chunk_size = client.get_max_batch_size()
+    chunks = [slice(i, i + chunk_size) for i in range(0, len(ids), chunk_size)]
+
+    def add_chunk(chunk):
+        collection.add(
+            ids=ids[chunk],
+            embeddings=embeddings[chunk],
+            metadatas=metadatas[chunk],
+            documents=documents[chunk]
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(add_chunk, chunks))
+    return len(chunks), chunk_size
 
 def main():
+    args = parse_args()
+
     # 1. Connect
-    print("Connecting to Chroma...")
-    # client = chromadb.PersistentClient(path="./chroma_db") # For local
-    # For Docker server
-    client = chromadb.HttpClient(host='localhost', port=8000)
+    print(f"Connecting to Chroma ({args.mode})...")
+    client = connect(args)
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         dataset = json.load(f)
 
@@ -25,7 +69,16 @@ def main():
     except:
         pass
 
-    collection = client.create_collection(name=collection_name)
+    collection = client.create_collection(
+        name=collection_name,
+        metadata={
+            "hnsw:space": args.space,
+            "hnsw:M": args.m,
+            "hnsw:construction_ef": args.construction_ef,
+            "hnsw:search_ef": args.search_ef,
+            "hnsw:batch_size": args.hnsw_batch_size
+        }
+    )
     print(f"Created collection '{collection_name}'.")
 
     # 3. Add Data
@@ -34,13 +87,10 @@ def main():
     metadatas = [{"category": item["metadata"]["category"]} for item in dataset]
     documents = [item["text"] for item in dataset]
 
-    collection.add(
-        ids=ids,
-        embeddings=embeddings,
-        metadatas=metadatas,
-        documents=documents
-    )
-    print(f"Added {len(ids)} items.")
+    start = time.perf_counter()
+    num_chunks, chunk_size = add_chunked(client, collection, ids, embeddings, metadatas, documents, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Added {len(ids)} items in {num_chunks} chunk(s) of up to {chunk_size} in {elapsed:.2f}s.")
 
     # 4. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
@@ -54,6 +104,13 @@ def main():
     for i, id in enumerate(results['ids'][0]):
         print(f"ID: {id}, Distance: {results['distances'][0][i]:.4f}, Text: {results['documents'][0][i]}, Metadata: {results['metadatas'][0][i]}")
 
+    # Query latency, comparable between --mode http and --mode persistent
+    start = time.perf_counter()
+    for i in range(args.queries):
+        collection.query(query_embeddings=[embeddings[i % len(embeddings)]], n_results=3)
+    elapsed = time.perf_counter() - start
+    print(f"{args.queries} queries: {elapsed / args.queries * 1000:.2f} ms/query ({args.mode})")
+
     # 5. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
     results = collection.query(
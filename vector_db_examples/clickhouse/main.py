@@ -1,17 +1,137 @@
 import clickhouse_connect
+import argparse
 import json
 import os
+import time
 import numpy as np
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="ClickHouse vector search example")
+    parser.add_argument("--quantization", choices=["f64", "f32", "f16", "bf16", "i8", "b1"], default="bf16",
+                        help="Vector quantization inside the HNSW index")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=128)
+    parser.add_argument("--ef-search", type=int, default=256, help="hnsw_candidate_list_size_for_search")
+    parser.add_argument("--block-size", type=int, default=100000, help="Rows per insert block")
+    parser.add_argument("--update-mode", choices=["replacing", "mutation"], default="replacing",
+                        help="Insert new row versions into a ReplacingMergeTree, or ALTER TABLE UPDATE mutations")
+    parser.add_argument("--mutation-timeout", type=float, default=60.0, help="Seconds to wait for mutations")
+    parser.add_argument("--candidates", type=int, default=20,
+                        help="ANN candidates re-read with FINAL in replacing mode, so stale versions are dropped")
+    return parser.parse_args()
+
+
+def wait_for_mutations(client, table, timeout):
+    # Poll system.mutations until no mutation on the table is pending
+    start = time.perf_counter()
+    while True:
+        pending = client.query("""
+            SELECT count(), any(latest_fail_reason)
+            FROM system.mutations
+            WHERE database = currentDatabase() AND table = {table:String} AND NOT is_done
+        """, parameters={"table": table}).result_rows[0]
+        if pending[0] == 0:
+            return time.perf_counter() - start
+        if pending[1]:
+            raise RuntimeError(f"Mutation failed: {pending[1]}")
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{pending[0]} mutation(s) still pending on {table}")
+        time.sleep(0.05)
+
+
+def update_categories(client, updates, mode, timeout):
+    # updates: {id: new_category}, applied in one statement
+    ids = list(updates)
+    categories = [updates[i] for i in ids]
+    params = {"ids": ids, "categories": categories}
+    start = time.perf_counter()
+
+    if mode == "replacing":
+        # A new version of each row; FINAL (or a background merge) keeps only the
+        # highest version, so nothing is rewritten and the change is visible at once
+        client.command("""
+            INSERT INTO items (id, text, category, vector, version)
+            SELECT id, text,
+                   transform(id, {ids:Array(Int32)}, {categories:Array(String)}, category),
+                   vector, version + 1
+            FROM items FINAL
+            WHERE id IN {ids:Array(Int32)}
+        """, parameters=params)
+    else:
+        # Mutation rewrites every part that contains a matching row
+        client.command("""
+            ALTER TABLE items
+            UPDATE category = transform(id, {ids:Array(Int32)}, {categories:Array(String)}, category)
+            WHERE id IN {ids:Array(Int32)}
+        """, parameters=params)
+        wait_for_mutations(client, "items", timeout)
+
+    return time.perf_counter() - start
+
+
+def vector_search(client, query_vector, k, args):
+    # Typed server-side parameter instead of an array literal spliced into the SQL;
+    # ORDER BY L2Distance(...) LIMIT n lets the planner use the vector index
+    if args.update_mode == "mutation":
+        return client.query("""
+            SELECT id, text, category, L2Distance(vector, {query_vector:Array(Float32)}) as dist
+            FROM items
+            ORDER BY dist ASC
+            LIMIT {k:UInt32}
+        """, parameters={"query_vector": query_vector, "k": k}).result_rows
+
+    # Until a merge runs, every version of an updated row is in the table and
+    # in the vector index. The index picks candidate ids; FINAL on just those
+    # ids keeps the latest version of each. Old versions take candidate slots,
+    # so --candidates should leave room above k for recently updated rows.
+    return client.query("""
+        SELECT id, text, category, L2Distance(vector, {query_vector:Array(Float32)}) as dist
+        FROM items FINAL
+        WHERE id IN (
+            SELECT id FROM items
+            ORDER BY L2Distance(vector, {query_vector:Array(Float32)}) ASC
+            LIMIT {candidates:UInt32}
+        )
+        ORDER BY dist ASC
+        LIMIT {k:UInt32}
+    """, parameters={"query_vector": query_vector, "k": k, "candidates": max(k, args.candidates)}).result_rows
+
+def insert_columns(client, data, block_size):
+    # Column-oriented blocks: vectors stay numpy arrays instead of per-row Python lists
+    for start in range(0, len(data), block_size):
+        block = data[start:start + block_size]
+        ids = np.array([item["id"] for item in block], dtype=np.int32)
+        texts = [item["text"] for item in block]
+        categories = [item["metadata"]["category"] for item in block]
+        vectors = np.array([item["vector"] for item in block], dtype=np.float32)
+        client.insert(
+            "items",
+            [ids, texts, categories, list(vectors)],
+            column_names=["id", "text", "category", "vector"],
+            column_oriented=True
+        )
+
+
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to ClickHouse...")
-    client = clickhouse_connect.get_client(host='localhost', password="default", port=8123)
+    # Settings passed here apply to every query of this client
+    client = clickhouse_connect.get_client(
+        host='localhost',
+        password="default",
+        port=8123,
+        settings={
+            "allow_experimental_vector_similarity_index": 1,
+            "hnsw_candidate_list_size_for_search": args.ef_search
+        }
+    )
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -21,60 +141,36 @@ def main():
     client.command("DROP TABLE IF EXISTS items")
 
     # Create table with Array(Float32) for vectors
-    # Note: Enable experimental vector search indices if needed via settings
-    # SET allow_experimental_vector_similarity_index = 1
-    client.command("SET allow_experimental_vector_similarity_index = 1")
-
+    # ReplacingMergeTree keeps the highest version per id, so updates are plain inserts
+    engine = "ReplacingMergeTree(version)" if args.update_mode == "replacing" else "MergeTree()"
+    # vector_similarity('hnsw', distance, dimensions, quantization, M, ef_construction)
+    # Large GRANULARITY builds one HNSW graph per part rather than per granule block
     client.command(f"""
         CREATE TABLE items (
             id Int32,
             text String,
             category String,
             vector Array(Float32),
-            INDEX vec_idx vector TYPE vector_similarity('L2', 'HNSW', 'm=16', 'ef_construction=100') GRANULARITY 1000
-        ) ENGINE = MergeTree()
+            version UInt32 DEFAULT 1,
+            INDEX vec_idx vector TYPE vector_similarity(
+                'hnsw', 'L2Distance', {dim}, '{args.quantization}', {args.m}, {args.ef_construction}
+            ) GRANULARITY 100000000
+        ) ENGINE = {engine}
         ORDER BY id
     """)
     print("Table created.")
 
     # 2. Insert Data
     print(f"Inserting {len(data)} items...")
-    # Prepare data for batch insert
-    # data format for clickhouse-connect: [[row1], [row2], ...]
-    rows = []
-    for item in data:
-        rows.append([
-            item["id"],
-            item["text"],
-            item["metadata"]["category"],
-            item["vector"]
-        ])
-
-    client.insert("items", rows, column_names=["id", "text", "category", "vector"])
-    print("Data inserted.")
+    start = time.perf_counter()
+    insert_columns(client, data, args.block_size)
+    print(f"Data inserted in {time.perf_counter() - start:.2f}s.")
 
     # 3. Search (Vector Search via Distance)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
     query_vector = data[0]["vector"]
 
-    # Use L2Distance function.
-    # query_vector needs to be passed as parameter? Or string literal?
-    # clickhouse-connect supports parameterized queries nicely?
-    # Or format the array string.
-
-    # For parameterized query with array:
-    # Use python list directly.
-    # formatting list as string for simplicity
-    query_vec_str = str(query_vector)
-
-    result = client.query(f"""
-        SELECT id, text, category, L2Distance(vector, {query_vec_str}) as dist
-        FROM items
-        ORDER BY dist ASC
-        LIMIT 3
-    """)
-
-    for row in result.result_rows:
+    for row in vector_search(client, query_vector, 3, args):
         print(f"ID: {row[0]}, Text: {row[1]}, Category: {row[2]}, Distance: {row[3]:.4f}")
 
     # 4. Search with Metadata Filter
@@ -94,35 +190,33 @@ def main():
     # 5. Update Metadata
     print("\n--- Updating Metadata ---")
     item_id = data[0]["id"]
+    # FINAL returns only the latest version of each row
+    final = "FINAL" if args.update_mode == "replacing" else ""
 
     # Verify before
-    before = client.query(f"SELECT category FROM items WHERE id = {item_id}").result_rows[0][0]
+    before = client.query(f"SELECT category FROM items {final} WHERE id = {{id:Int32}}",
+                          parameters={"id": item_id}).result_rows[0][0]
     print(f"Before: {before}")
 
-    # ClickHouse update is heavy (ALTER TABLE UPDATE).
-    # For small updates, it's asynchronous mutation.
-    client.command(f"ALTER TABLE items UPDATE category = 'food' WHERE id = {item_id}")
-
-    # Wait for mutation? Or query immediately (might not reflect immediately unless mutation finishes).
-    # We can check mutations table or just wait a bit.
-    import time
-    time.sleep(1)  # Simple wait
+    elapsed = update_categories(client, {item_id: "food"}, args.update_mode, args.mutation_timeout)
 
     # Verify after
-    after = client.query(f"SELECT category FROM items WHERE id = {item_id}").result_rows[0][0]
-    print(f"After: {after}")
+    after = client.query(f"SELECT category FROM items {final} WHERE id = {{id:Int32}}",
+                         parameters={"id": item_id}).result_rows[0][0]
+    print(f"After: {after} (visible after {elapsed * 1000:.1f} ms, {args.update_mode})")
 
     # 6. Delete Item
     print("\n--- Deleting Item ---")
-    client.command(f"ALTER TABLE items DELETE WHERE id = {item_id}")
-
-    # Wait for mutation
-    time.sleep(1)
+    # Lightweight delete only masks the rows; parts are cleaned up by later merges
+    start = time.perf_counter()
+    client.command("DELETE FROM items WHERE id = {id:Int32}", parameters={"id": item_id})
+    elapsed = time.perf_counter() - start + wait_for_mutations(client, "items", args.mutation_timeout)
 
     # Verify
-    count = client.query(f"SELECT count() FROM items WHERE id = {item_id}").result_rows[0][0]
+    count = client.query("SELECT count() FROM items WHERE id = {id:Int32}",
+                         parameters={"id": item_id}).result_rows[0][0]
     if count == 0:
-        print("Item successfully deleted.")
+        print(f"Item successfully deleted (visible after {elapsed * 1000:.1f} ms).")
     else:
         print("Item still exists (mutation pending).")
 
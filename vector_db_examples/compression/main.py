@@ -0,0 +1,211 @@
+import numpy as np
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# Popcount of every byte value, for Hamming distances over packed bits
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def kmeans(vectors, k, iters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iters):
+        d = (centroids ** 2).sum(1)[None, :] - 2 * vectors @ centroids.T
+        assignments = d.argmin(1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=k)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+    return centroids
+
+class ScalarQuantizer:
+    """int8 codes: each dimension mapped linearly from its trained [min, max] to 0..255."""
+
+    name = "sq8"
+
+    def train(self, vectors):
+        self.low = vectors.min(0)
+        self.scale = np.maximum(vectors.max(0) - self.low, 1e-12) / 255
+        return self
+
+    def encode(self, vectors):
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.low
+
+    def precompute(self, codes):
+        # Query-independent term of the distance: ||scale * c||^2 per code
+        return (codes.astype(np.float32) ** 2) @ (self.scale ** 2)
+
+    def distances(self, query, codes, code_norms, chunk=65536):
+        # ||q - (low + scale * c)||^2 = ||q - low||^2 - 2 ((q - low) * scale) . c + ||scale * c||^2
+        # The query terms are computed once; the scan is one product with the codes
+        shifted = query - self.low
+        weights = (shifted * self.scale).astype(np.float32)
+        out = code_norms + np.dot(shifted, shifted)
+        for start in range(0, len(codes), chunk):
+            out[start:start + chunk] -= 2 * (codes[start:start + chunk] @ weights)
+        return out
+
+class ProductQuantizer:
+    """m sub-vectors, each encoded as the index of its nearest of ksub centroids."""
+
+    name = "pq"
+
+    def __init__(self, m=48, ksub=256, iters=20):
+        if not 1 <= ksub <= 256:
+            raise ValueError(f"ksub={ksub} must be between 1 and 256 for uint8 codes")
+        self.m = m
+        self.ksub = ksub
+        self.iters = iters
+
+    def train(self, vectors):
+        dim = vectors.shape[1]
+        if dim % self.m:
+            raise ValueError(f"m={self.m} must divide the dimension {dim}")
+        self.dsub = dim // self.m
+        self.codebooks = np.stack([
+            kmeans(self._sub(vectors, j), self.ksub, self.iters, seed=j)
+            for j in range(self.m)
+        ])
+        return self
+
+    def _sub(self, vectors, j):
+        return vectors[:, j * self.dsub:(j + 1) * self.dsub]
+
+    def encode(self, vectors):
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = self._sub(vectors, j)
+            centroids = self.codebooks[j]
+            d = (centroids ** 2).sum(1)[None, :] - 2 * sub @ centroids.T
+            codes[:, j] = d.argmin(1)
+        return codes
+
+    def precompute(self, codes):
+        return None
+
+    def decode(self, codes):
+        return np.hstack([self.codebooks[j][codes[:, j]] for j in range(self.m)])
+
+    def distances(self, query, codes, aux=None):
+        # Asymmetric distance computation: a (m, ksub) table of query-to-centroid
+        # distances, then one table lookup and sum per code
+        q = query.reshape(self.m, 1, self.dsub)
+        table = ((self.codebooks - q) ** 2).sum(2)
+        return table[np.arange(self.m), codes].sum(1)
+
+class BinaryQuantizer:
+    """1 bit per dimension (sign), packed 8 per byte; Hamming distance."""
+
+    name = "binary"
+
+    def train(self, vectors):
+        return self
+
+    def precompute(self, codes):
+        return None
+
+    def encode(self, vectors):
+        return np.packbits(vectors > 0, axis=1)
+
+    def decode(self, codes):
+        return np.unpackbits(codes, axis=1).astype(np.float32) * 2 - 1
+
+    def distances(self, query, codes, aux=None):
+        q = np.packbits(query > 0)
+        return POPCOUNT[np.bitwise_xor(codes, q)].sum(1, dtype=np.int32)
+
+class CompressedIndex:
+    """Codes in memory, full vectors in a memory-mapped float32 file for re-ranking."""
+
+    def __init__(self, quantizer, float_path):
+        self.quantizer = quantizer
+        self.float_path = float_path
+
+    def build(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.quantizer.train(vectors)
+        self.codes = self.quantizer.encode(vectors)
+        self.aux = self.quantizer.precompute(self.codes)
+
+        # Raw floats go to disk; only the rows being re-ranked are paged in
+        floats = np.memmap(self.float_path, dtype=np.float32, mode="w+", shape=vectors.shape)
+        floats[:] = vectors
+        floats.flush()
+        del floats
+        self.floats = np.memmap(self.float_path, dtype=np.float32, mode="r", shape=vectors.shape)
+        return self
+
+    @property
+    def bytes_per_vector(self):
+        # In-memory footprint: codes plus any per-vector side data (SQ8 norms)
+        aux = self.aux.nbytes if self.aux is not None else 0
+        return (self.codes.nbytes + aux) / len(self.codes)
+
+    def search(self, query, k=10, rerank=0):
+        query = np.asarray(query, dtype=np.float32)
+        d = self.quantizer.distances(query, self.codes, self.aux)
+        n = max(k, rerank)
+        candidates = np.argpartition(d, n - 1)[:n] if len(d) > n else np.arange(len(d))
+        if not rerank:
+            return candidates[np.argsort(d[candidates])][:k]
+
+        # Exact squared L2 on the candidates, read in row order from the float file
+        candidates = np.sort(candidates)
+        exact = ((self.floats[candidates] - query) ** 2).sum(1)
+        return candidates[np.argsort(exact)][:k]
+
+def recall(found, expected):
+    return np.mean([len(set(f.tolist()) & set(e.tolist())) / len(e) for f, e in zip(found, expected)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector compression with exact re-ranking")
+    parser.add_argument("--pq-m", type=int, default=48, help="PQ sub-vectors (must divide the dimension)")
+    parser.add_argument("--pq-ksub", type=int, default=256, help="PQ centroids per sub-vector (at most 256)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--rerank", type=int, default=10, help="Candidates re-ranked with the float vectors")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    # Load dataset
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    vectors = np.array([item["vector"] for item in data], dtype=np.float32)
+    queries = vectors[:args.queries]
+    k = min(args.k, len(vectors))
+
+    # Ground truth: exact squared L2
+    expected = [np.argsort(((vectors - q) ** 2).sum(1))[:k] for q in queries]
+    print(f"{len(vectors)} vectors, float32: {vectors.shape[1] * 4} bytes/vector")
+
+    quantizers = [ScalarQuantizer(), ProductQuantizer(m=args.pq_m, ksub=args.pq_ksub), BinaryQuantizer()]
+    with tempfile.TemporaryDirectory() as tmp:
+        for quantizer in quantizers:
+            start = time.perf_counter()
+            index = CompressedIndex(quantizer, os.path.join(tmp, f"{quantizer.name}.f32")).build(vectors)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            codes_only = [index.search(q, k) for q in queries]
+            code_latency = (time.perf_counter() - start) / len(queries)
+
+            start = time.perf_counter()
+            reranked = [index.search(q, k, rerank=args.rerank) for q in queries]
+            rerank_latency = (time.perf_counter() - start) / len(queries)
+
+            print(f"{quantizer.name:6s}: {index.bytes_per_vector:6.1f} bytes/vector, build {build:.2f}s, "
+                  f"recall@{k} {recall(codes_only, expected):.3f} ({code_latency * 1000:.3f} ms), "
+                  f"re-ranked top {args.rerank} {recall(reranked, expected):.3f} ({rerank_latency * 1000:.3f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import json
+import numpy as np
+import os
+import time
+
+class StreamingPCA:
+    """PCA fitted from chunks: the d x d covariance is accumulated one chunk at a
+    time, then its top components are found by randomized subspace iteration."""
+
+    def __init__(self, n_components, oversample=10, n_iter=4, seed=0):
+        self.n_components = n_components
+        self.oversample = oversample
+        self.n_iter = n_iter
+        self.seed = seed
+        self.count = 0
+        self.sum = None
+        self.gram = None
+
+    def partial_fit(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if self.sum is None:
+            self.sum = np.zeros(chunk.shape[1])
+            self.gram = np.zeros((chunk.shape[1], chunk.shape[1]))
+        self.count += len(chunk)
+        self.sum += chunk.sum(0)
+        self.gram += chunk.T @ chunk
+        return self
+
+    def finalize(self):
+        self.mean = self.sum / self.count
+        cov = (self.gram - self.count * np.outer(self.mean, self.mean)) / max(1, self.count - 1)
+
+        # Randomized range finder on the covariance, then an exact eigendecomposition
+        # of the small projected matrix
+        rng = np.random.default_rng(self.seed)
+        size = min(self.n_components + self.oversample, cov.shape[0])
+        q, _ = np.linalg.qr(cov @ rng.normal(size=(cov.shape[0], size)))
+        for _ in range(self.n_iter):
+            q, _ = np.linalg.qr(cov @ q)
+        eigenvalues, eigenvectors = np.linalg.eigh(q.T @ cov @ q)
+        order = np.argsort(eigenvalues)[::-1][:self.n_components]
+        self.components = (q @ eigenvectors[:, order]).T.astype(np.float32)
+        self.explained_variance_ratio = eigenvalues[order].sum() / np.trace(cov)
+        return self
+
+    def transform(self, chunk):
+        return (np.asarray(chunk, dtype=np.float32) - self.mean.astype(np.float32)) @ self.components.T
+
+def chunks(vectors, chunk_size):
+    for start in range(0, len(vectors), chunk_size):
+        yield vectors[start:start + chunk_size]
+
+def reduce(vectors, method, dim, chunk_size, normalize):
+    if method == "pca":
+        pca = StreamingPCA(dim)
+        for chunk in chunks(vectors, chunk_size):
+            pca.partial_fit(chunk)
+        pca.finalize()
+        print(f"PCA explained variance with {dim} components: {pca.explained_variance_ratio:.3f}")
+        reduced = np.vstack([pca.transform(chunk) for chunk in chunks(vectors, chunk_size)])
+    else:
+        # Matryoshka-style prefix truncation: only meaningful for models trained for it
+        reduced = vectors[:, :dim].copy()
+
+    if normalize:
+        # Keep cosine and L2 rankings consistent for backends that assume unit vectors
+        reduced /= np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)
+    return reduced
+
+def compare(full, reduced, k, num_queries):
+    # Recall of exact search in the reduced space against the full dimension,
+    # and the cost of the distance computations themselves
+    queries = np.arange(min(num_queries, len(full)))
+    k = min(k, len(full))
+
+    def search(vectors):
+        start = time.perf_counter()
+        d = (vectors ** 2).sum(1)[None, :] - 2 * vectors[queries] @ vectors.T
+        found = np.argsort(d, axis=1)[:, :k]
+        return found, time.perf_counter() - start
+
+    expected, full_time = search(full)
+    found, reduced_time = search(reduced)
+    recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found.tolist(), expected.tolist())])
+    print(f"Recall@{k} vs {full.shape[1]} dims: {recall:.3f}")
+    print(f"Brute-force search: {full_time * 1000:.2f} ms at {full.shape[1]} dims, "
+          f"{reduced_time * 1000:.2f} ms at {reduced.shape[1]} dims")
+    print(f"Vector memory: {full.shape[1] * 4} -> {reduced.shape[1] * 4} bytes/vector")
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Reduce dataset dimensionality before ingestion")
+    parser.add_argument("--method", choices=["pca", "truncate"], default="pca")
+    parser.add_argument("--dim", type=int, default=128, help="Target dimension")
+    parser.add_argument("--input", default=os.path.join(script_dir, 'dataset.json'))
+    parser.add_argument("--output", default=None, help="Default: dataset_<method><dim>.json next to the input")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Vectors per PCA pass chunk")
+    parser.add_argument("--no-normalize", action="store_true", help="Do not L2-normalize the reduced vectors")
+    parser.add_argument("--k", type=int, default=10, help="k for the recall comparison")
+    parser.add_argument("--queries", type=int, default=100, help="Queries for the recall comparison")
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as f:
+        dataset = json.load(f)
+
+    full = np.array([item["vector"] for item in dataset], dtype=np.float32)
+    if args.dim >= full.shape[1]:
+        raise ValueError(f"Target dimension {args.dim} must be below {full.shape[1]}")
+
+    reduced = reduce(full, args.method, args.dim, args.chunk_size, not args.no_normalize)
+    compare(full, reduced, args.k, args.queries)
+
+    for item, vector in zip(dataset, reduced):
+        item["vector"] = vector.tolist()
+
+    output_path = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(args.input)), f"dataset_{args.method}{args.dim}.json"
+    )
+    with open(output_path, 'w') as f:
+        json.dump(dataset, f, indent=2)
+
+    print(f"Wrote {len(dataset)} items with {args.dim} dimensions to {output_path}")
+    print(f"Ingest with: DATASET_PATH={output_path} python main.py")
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ def main():
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
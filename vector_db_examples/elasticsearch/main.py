@@ -1,16 +1,131 @@
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, helpers
+import argparse
 import json
 import os
 import time
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Elasticsearch vector search example")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--max-chunk-bytes", type=int, default=10 * 1024 * 1024, help="Upper bound on bulk request size")
+    parser.add_argument("--thread-count", type=int, default=4, help="Parallel bulk workers")
+    parser.add_argument("--force-merge", action="store_true",
+                        help="Force merge to one segment after loading, so kNN searches a single HNSW graph")
+    parser.add_argument("--index-type", choices=["hnsw", "int8_hnsw", "int4_hnsw", "bbq_hnsw"], default="int8_hnsw",
+                        help="dense_vector index_options type; quantized types cut heap per vector")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per node")
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--num-candidates", type=int, default=100, help="Candidates per shard for kNN queries")
+    parser.add_argument("--oversample", type=float, default=None,
+                        help="Rescore k * oversample quantized hits with the float vectors, per query (ES 8.18+)")
+    parser.add_argument("--msearch-batch", type=int, default=50, help="kNN queries per _msearch request")
+    return parser.parse_args()
+
+def vector_mapping(dim, args):
+    index_options = {
+        "type": args.index_type,
+        "m": args.m,
+        "ef_construction": args.ef_construction
+    }
+    return {
+        "type": "dense_vector",
+        "dims": dim,
+        "index": True,
+        "similarity": "cosine",
+        "index_options": index_options
+    }
+
+def knn_body(query_vector, k, args):
+    knn = {
+        "field": "vector",
+        "query_vector": query_vector,
+        "k": k,
+        "num_candidates": max(args.num_candidates, k)
+    }
+    if args.oversample and args.index_type != "hnsw":
+        knn["rescore_vector"] = {"oversample": args.oversample}
+    return {"knn": knn, "size": k, "_source": ["text", "category"]}
+
+def knn_msearch(es, index_name, query_vectors, k, args):
+    # Send kNN queries in _msearch batches: one HTTP round trip per batch
+    responses = []
+    for i in range(0, len(query_vectors), args.msearch_batch):
+        searches = []
+        for query_vector in query_vectors[i:i + args.msearch_batch]:
+            searches.append({"index": index_name})
+            searches.append(knn_body(query_vector, k, args))
+        result = es.msearch(searches=searches)
+        for response in result["responses"]:
+            # Each search in the batch succeeds or fails on its own
+            if "error" in response:
+                print(f"kNN query failed: {response['error']}")
+            responses.append(response)
+    return responses
+
+def generate_actions(data, index_name):
+    # Stream actions instead of building all documents in memory
+    for item in data:
+        yield {
+            "_index": index_name,
+            "_id": str(item["id"]),
+            "_source": {
+                "text": item["text"],
+                "category": item["metadata"]["category"],
+                "vector": item["vector"]
+            }
+        }
+
+def index_settings(es, index_name, names):
+    # Explicitly set index settings; None for unset ones, which written back
+    # resets them to the default (for refresh_interval, this keeps the
+    # search-idle refresh skipping that an explicit "1s" would turn off)
+    explicit = es.indices.get_settings(index=index_name)[index_name]["settings"]["index"]
+    return {name: explicit.get(name) for name in names}
+
+def bulk_load(es, index_name, data, args):
+    # Disable refresh and replicas while loading: every refresh creates a new segment
+    # (and HNSW graph) that later has to be merged, and replicas repeat the work.
+    original = index_settings(es, index_name, ["refresh_interval", "number_of_replicas"])
+    es.indices.put_settings(index=index_name, settings={"index": {"refresh_interval": "-1", "number_of_replicas": 0}})
+
+    indexed = 0
+    failed = 0
+    start = time.perf_counter()
+    try:
+        for ok, info in helpers.parallel_bulk(
+            es,
+            generate_actions(data, index_name),
+            thread_count=args.thread_count,
+            chunk_size=args.chunk_size,
+            max_chunk_bytes=args.max_chunk_bytes,
+            raise_on_error=False
+        ):
+            if ok:
+                indexed += 1
+            else:
+                failed += 1
+                print(f"Failed to index: {info}")
+    finally:
+        es.indices.put_settings(index=index_name, settings={"index": original})
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {indexed} documents ({failed} failed) in {elapsed:.2f}s.")
+
+    es.indices.refresh(index=index_name)
+    if args.force_merge:
+        start = time.perf_counter()
+        es.indices.forcemerge(index=index_name, max_num_segments=1)
+        print(f"Force merged to one segment in {time.perf_counter() - start:.2f}s.")
+
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to Elasticsearch...")
-    es = Elasticsearch("http://localhost:9200")
+    es = Elasticsearch("http://localhost:9200", request_timeout=120)
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -25,31 +140,17 @@ def main():
         "properties": {
             "text": {"type": "text"},
             "category": {"type": "keyword"},
-            "vector": {
-                "type": "dense_vector",
-                "dims": dim,
-                "index": True,
-                "similarity": "cosine"
-            }
+            "vector": vector_mapping(dim, args)
         }
     }
 
     es.indices.create(index=index_name, mappings=mapping)
-    print(f"Index '{index_name}' created.")
+    print(f"Index '{index_name}' created ({args.index_type}).")
 
     # 2. Index Documents
     print(f"Indexing {len(data)} documents...")
-    actions = []
-    for item in data:
-        doc = {
-            "text": item["text"],
-            "category": item["metadata"]["category"],
-            "vector": item["vector"]
-        }
-        es.index(index=index_name, id=str(item["id"]), document=doc)
-
-    # Refresh to make searchable immediately
-    es.indices.refresh(index=index_name)
+    # Refreshes at the end to make them searchable immediately
+    bulk_load(es, index_name, data, args)
     print("Documents indexed.")
 
     # 3. Search (Vector Search via kNN)
@@ -57,20 +158,24 @@ def main():
     query_vector = data[0]["vector"]
 
     # In ES 8.x, knn search is top-level parameter
-    response = es.search(
-        index=index_name,
-        knn={
-            "field": "vector",
-            "query_vector": query_vector,
-            "k": 3,
-            "num_candidates": 100
-        },
-        source=["text", "category"]
-    )
+    response = es.search(index=index_name, body=knn_body(query_vector, 3, args))
 
     for hit in response['hits']['hits']:
         print(f"ID: {hit['_id']}, Score: {hit['_score']:.4f}, Text: {hit['_source']['text']}, Category: {hit['_source']['category']}")
 
+    # Batched kNN via _msearch
+    print("\n--- Batched kNN via _msearch (every item as a query) ---")
+    query_vectors = [item["vector"] for item in data]
+    start = time.perf_counter()
+    responses = knn_msearch(es, index_name, query_vectors, 3, args)
+    elapsed = time.perf_counter() - start
+    print(f"{len(responses)} queries in {elapsed:.3f}s ({len(responses) / elapsed:.0f} QPS)")
+    for item, response in zip(data[:3], responses):
+        if "error" in response:
+            continue
+        ids = [hit['_id'] for hit in response['hits']['hits']]
+        print(f"Query ID {item['id']}: {ids}")
+
     # 4. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
 
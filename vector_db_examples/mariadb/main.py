@@ -1,9 +1,26 @@
 import mysql.connector
+import argparse
 import json
 import os
+import time
 import numpy as np
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="MariaDB vector example")
+    parser.add_argument("--m", type=int, default=16, help="Vector index M (graph connections per node)")
+    parser.add_argument("--distance", choices=["euclidean", "cosine"], default="euclidean")
+    parser.add_argument("--ef-search", type=int, default=20, help="mhnsw_ef_search for this session")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per multi-row INSERT")
+    return parser.parse_args()
+
+def vector_bytes(vector):
+    # MariaDB stores VECTOR as packed little-endian float32, so sending that
+    # format skips VEC_FromText parsing on the server
+    return np.asarray(vector, dtype='<f4').tobytes()
+
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to MariaDB...")
     conn = mysql.connector.connect(
@@ -16,7 +33,7 @@ def main():
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -30,43 +47,45 @@ def main():
             id INT PRIMARY KEY,
             text TEXT,
             category VARCHAR(255),
-            embedding VECTOR({dim})
+            embedding VECTOR({dim}) NOT NULL
         ) ENGINE=InnoDB
     """)
     print("Table created.")
 
-    # 2. Create Vector Index
-    # Syntax might vary slightly depending on preview status
-    # Standard syntax: ALTER TABLE t ADD VECTOR INDEX (col)
+    # 2. Insert Data
+    # executemany rewrites the INSERT into multi-row statements, one round trip per batch
+    print(f"Inserting {len(data)} items...")
+    sql = "INSERT INTO items (id, text, category, embedding) VALUES (%s, %s, %s, %s)"
+
+    start = time.perf_counter()
+    for i in range(0, len(data), args.batch_size):
+        batch = data[i:i + args.batch_size]
+        cursor.executemany(sql, [
+            (item["id"], item["text"], item["metadata"]["category"], vector_bytes(item["vector"]))
+            for item in batch
+        ])
+    conn.commit()
+    print(f"Data inserted in {time.perf_counter() - start:.2f}s.")
+
+    # 3. Create Vector Index
+    # Built after loading so the graph is constructed once over all rows
     try:
-        cursor.execute("CREATE VECTOR INDEX vec_idx ON items(embedding)")
-        print("Vector index created.")
+        start = time.perf_counter()
+        cursor.execute(f"ALTER TABLE items ADD VECTOR INDEX vec_idx (embedding) M={args.m} DISTANCE={args.distance}")
+        print(f"Vector index created in {time.perf_counter() - start:.2f}s.")
     except Exception as e:
         print(f"Vector index creation failed (might be implicit or not supported yet): {e}")
 
-    # 3. Insert Data
-    print(f"Inserting {len(data)} items...")
-    sql = "INSERT INTO items (id, text, category, embedding) VALUES (%s, %s, %s, VEC_FromText(%s))"
-
-    for item in data:
-        vec_str = str(item["vector"]) # Format as string '[1.0, 2.0, ...]'
-        cursor.execute(sql, (item["id"], item["text"], item["metadata"]["category"], vec_str))
-
-    conn.commit()
-    print("Data inserted.")
-
     # 4. Search (Vector Search via Distance)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
-    query_vector = str(data[0]["vector"])
+    query_vector = vector_bytes(data[0]["vector"])
 
-    # Using VEC_DISTANCE_EUCLIDEAN (L2) or VEC_DISTANCE_COSINE?
-    # Usually euclidean is default distance for vector search
-    # If using Cosine similarity, use VEC_DISTANCE_COSINE? Or 1 - cosine
-    # MariaDB 11.4 usually supports VEC_DISTANCE
+    # The distance function has to match the index DISTANCE for the index to be used
+    cursor.execute("SET SESSION mhnsw_ef_search = %s", (args.ef_search,))
 
     try:
         cursor.execute(f"""
-            SELECT id, text, category, VEC_DISTANCE(embedding, VEC_FromText(%s)) as dist
+            SELECT id, text, category, VEC_DISTANCE_{args.distance.upper()}(embedding, %s) as dist
             FROM items
             ORDER BY dist ASC
             LIMIT 3
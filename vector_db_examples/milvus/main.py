@@ -4,18 +4,113 @@ from pymilvus import (
     FieldSchema, CollectionSchema, DataType,
     Collection,
 )
+import argparse
 import json
 import numpy as np
 import os
+import time
+
+# Build and search parameters per index type
+INDEX_PARAMS = {
+    "HNSW": lambda args: ({"M": args.m, "efConstruction": args.ef_construction}, {"ef": args.ef}),
+    "IVF_FLAT": lambda args: ({"nlist": args.nlist}, {"nprobe": args.nprobe}),
+    "IVF_SQ8": lambda args: ({"nlist": args.nlist}, {"nprobe": args.nprobe}),
+    "IVF_PQ": lambda args: ({"nlist": args.nlist, "m": args.pq_m, "nbits": args.pq_nbits}, {"nprobe": args.nprobe}),
+    "DISKANN": lambda args: ({}, {"search_list": args.search_list}),
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Milvus example")
+    parser.add_argument("--index-type", choices=list(INDEX_PARAMS), default="HNSW")
+    parser.add_argument("--m", type=int, default=16, help="HNSW M")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", type=int, default=64, help="HNSW ef at search time")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=48, help="IVF_PQ sub-quantizers (must divide the dimension)")
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--search-list", type=int, default=100, help="DISKANN search_list at search time")
+    parser.add_argument("--category-mode", choices=["partition_key", "scalar_index", "none"], default="partition_key",
+                        help="Make category a partition key or give it an INVERTED scalar index (Milvus 2.4+)")
+    parser.add_argument("--num-partitions", type=int, default=16, help="Partitions for the partition key")
+    parser.add_argument("--chunk-mb", type=float, default=32.0, help="Upper bound on each insert request")
+    parser.add_argument("--flush-every", type=int, default=0,
+                        help="Flush after this many rows (0: only once after the load)")
+    parser.add_argument("--consistency", choices=["Strong", "Bounded", "Session", "Eventually"], default="Bounded",
+                        help="Consistency level for searches; Strong waits for the latest writes on every request")
+    parser.add_argument("--nq", type=int, default=100, help="Query vectors per batched search request")
+    parser.add_argument("--iterator-batch", type=int, default=1000, help="Rows per search/query iterator page")
+    parser.add_argument("--local", default=None, metavar="PATH",
+                        help="Milvus Lite database file (e.g. ./milvus.db) instead of the Docker server")
+    return parser.parse_args()
+
+def batched_search(collection, query_matrix, search_params, limit, nq, consistency, **kwargs):
+    # nq query vectors per request amortize the RPC and scheduling overhead
+    results = []
+    for start in range(0, len(query_matrix), nq):
+        results.extend(collection.search(
+            data=query_matrix[start:start + nq],
+            anns_field="vector",
+            param=search_params,
+            limit=limit,
+            consistency_level=consistency,
+            **kwargs
+        ))
+    return results
+
+def iterate(iterator):
+    # Drain a search/query iterator page by page without holding all results
+    try:
+        while True:
+            page = iterator.next()
+            if not page:
+                break
+            yield page
+    finally:
+        iterator.close()
+
+def insert_chunked(collection, ids, vectors, categories, texts, chunk_mb, flush_every):
+    # Rows per chunk from the vector payload size; stays under the gRPC message limit
+    row_bytes = vectors.shape[1] * vectors.itemsize
+    chunk_rows = max(1, int(chunk_mb * 1024 * 1024 // row_bytes))
+
+    inserted = 0
+    since_flush = 0
+    for start in range(0, len(ids), chunk_rows):
+        end = start + chunk_rows
+        result = collection.insert([ids[start:end], vectors[start:end], categories[start:end], texts[start:end]])
+        inserted += result.insert_count
+        since_flush += result.insert_count
+        if flush_every and since_flush >= flush_every:
+            # Seal growing segments so index building can start during the load
+            collection.flush()
+            since_flush = 0
+    collection.flush()
+    return inserted
 
 def main():
+    args = parse_args()
+
     # 1. Connect to Milvus
-    print("Connecting to Milvus...")
-    connections.connect("default", host="localhost", port="19530")
+    if args.local:
+        # Milvus Lite runs in this process from a local file
+        print(f"Opening Milvus Lite at {args.local}...")
+        connections.connect("default", uri=args.local)
+        if args.index_type != "IVF_FLAT":
+            # Milvus Lite only builds FLAT, IVF_FLAT and AUTOINDEX
+            print(f"{args.index_type} is not available in Milvus Lite, using IVF_FLAT.")
+            args.index_type = "IVF_FLAT"
+        if args.category_mode != "none":
+            # Nor partition keys or INVERTED scalar indexes; category filters scan
+            print(f"--category-mode {args.category_mode} is not available in Milvus Lite, using none.")
+            args.category_mode = "none"
+    else:
+        print("Connecting to Milvus...")
+        connections.connect("default", host="localhost", port="19530")
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         dataset = json.load(f)
 
@@ -31,42 +126,47 @@ def main():
     fields = [
         FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
         FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=dim),
-        FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=100),
+        # A partition key routes each category to its own partition, so category
+        # filters only search the matching partitions
+        FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=100,
+                    is_partition_key=args.category_mode == "partition_key"),
         FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=1000)
     ]
 
     schema = CollectionSchema(fields, "Example collection for vector search")
-    collection = Collection(collection_name, schema)
+    if args.category_mode == "partition_key":
+        collection = Collection(collection_name, schema, num_partitions=args.num_partitions)
+    else:
+        collection = Collection(collection_name, schema)
 
     # 3. Insert Data
-    # Prepare data in column format
-    ids = [item["id"] for item in dataset]
-    vectors = [item["vector"] for item in dataset]
+    # Prepare data in column format; vectors as one float32 matrix
+    ids = np.array([item["id"] for item in dataset], dtype=np.int64)
+    vectors = np.array([item["vector"] for item in dataset], dtype=np.float32)
     categories = [item["metadata"]["category"] for item in dataset]
     texts = [item["text"] for item in dataset]
 
-    entities = [
-        ids,
-        vectors,
-        categories,
-        texts
-    ]
-
-    insert_result = collection.insert(entities)
-    print(f"Inserted {insert_result.num_rows} entities.")
+    start = time.perf_counter()
+    inserted = insert_chunked(collection, ids, vectors, categories, texts, args.chunk_mb, args.flush_every)
+    print(f"Inserted {inserted} entities in {time.perf_counter() - start:.2f}s.")
 
     # 4. Create Index
+    build_params, search_params = INDEX_PARAMS[args.index_type](args)
     index_params = {
         "metric_type": "L2",
-        "index_type": "IVF_FLAT",
-        "params": {"nlist": 1024}
+        "index_type": args.index_type,
+        "params": build_params
     }
+    start = time.perf_counter()
     collection.create_index(field_name="vector", index_params=index_params)
+    if args.category_mode == "scalar_index":
+        collection.create_index(field_name="category", index_params={"index_type": "INVERTED"})
     collection.load()
+    print(f"{args.index_type} index built and loaded in {time.perf_counter() - start:.2f}s.")
 
     # 5. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 0) ---")
-    search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+    search_params = {"metric_type": "L2", "params": search_params}
     query_vector = [dataset[0]["vector"]]
 
     results = collection.search(
@@ -74,6 +174,42 @@ def main():
         anns_field="vector",
         param=search_params,
         limit=3,
+        consistency_level=args.consistency,
+        output_fields=["text", "category"]
+    )
+
+    for hits in results:
+        for hit in hits:
+            print(f"ID: {hit.id}, Distance: {hit.distance}, Text: {hit.entity.get('text')}, Category: {hit.entity.get('category')}")
+
+    # Batched Search (nq > 1)
+    print(f"\n--- Batched Search (every item as a query, nq={args.nq}, {args.consistency}) ---")
+    start = time.perf_counter()
+    results = batched_search(collection, vectors, search_params, 3, args.nq, args.consistency)
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} queries in {elapsed:.3f}s ({len(results) / elapsed:.0f} QPS)")
+
+    # Search Iterator: results beyond a single topk, streamed in pages
+    print("\n--- Search Iterator (all items ordered by distance to item 0) ---")
+    iterator = collection.search_iterator(
+        data=query_vector,
+        anns_field="vector",
+        param=search_params,
+        batch_size=args.iterator_batch,
+        output_fields=["category"]
+    )
+    for page in iterate(iterator):
+        print(f"Page: {[hit.id for hit in page]}")
+
+    # Filtered Vector Search
+    print("\n--- Filtered Vector Search Results (Top 3 with Category == 'tech') ---")
+    results = collection.search(
+        data=query_vector,
+        anns_field="vector",
+        param=search_params,
+        limit=3,
+        expr="category == 'tech'",
+        consistency_level=args.consistency,
         output_fields=["text", "category"]
     )
 
@@ -84,12 +220,15 @@ def main():
     # 6. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
     expr = "category == 'tech'"
-    results = collection.query(
+    # Query iterator pages through matches instead of returning them all at once
+    iterator = collection.query_iterator(
+        batch_size=args.iterator_batch,
         expr=expr,
         output_fields=["text", "category"]
     )
-    for res in results:
-        print(f"ID: {res['id']}, Text: {res['text']}, Category: {res['category']}")
+    for page in iterate(iterator):
+        for res in page:
+            print(f"ID: {res['id']}, Text: {res['text']}, Category: {res['category']}")
 
     # 7. Update Metadata (Upsert)
     # We update item 1 (Apple) to have category 'food'
@@ -106,8 +245,9 @@ def main():
 
     collection.upsert(upsert_data)
 
-    # Verify update
-    res = collection.query(expr=f"id == {item_to_update['id']}", output_fields=["category"])
+    # Verify update (Strong, so the read sees the upsert)
+    res = collection.query(expr=f"id == {item_to_update['id']}", output_fields=["category"],
+                           consistency_level="Strong")
     print(f"After Update: ID {res[0]['id']} Category = {res[0]['category']}")
 
     # 8. Delete
@@ -116,7 +256,7 @@ def main():
     collection.delete(expr)
 
     # Verify deletion
-    res = collection.query(expr=f"id == {item_to_update['id']}")
+    res = collection.query(expr=f"id == {item_to_update['id']}", consistency_level="Strong")
     if not res:
         print("Item successfully deleted.")
     else:
@@ -0,0 +1,464 @@
+import numpy as np
+import argparse
+import heapq
+import json
+import pickle
+import os
+import time
+
+class NumpyStore:
+    """Reference vector store in plain NumPy with the same methods as FaissStore.
+
+    mode="flat" scans every vector, mode="ivf" scans the nprobe closest k-means
+    lists and mode="hnsw" walks a layered graph kept in fixed-width adjacency
+    arrays. Distances are squared L2, as returned by faiss.IndexFlatL2.
+    """
+
+    def __init__(self, dim, mode="hnsw", index_path="numpy_index.pkl", metadata_path="numpy_meta.pkl",
+                 nlist=100, nprobe=8, kmeans_iters=20, m=16, ef_construction=100, ef_search=50, seed=0):
+        if mode not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.dim = dim
+        self.mode = mode
+        self.index_path = index_path
+        self.metadata_path = metadata_path
+
+        # IVF parameters
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+
+        # HNSW parameters: level 0 keeps 2*M neighbors, upper levels M
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.level_mult = 1 / np.log(m)
+        self.rng = np.random.default_rng(seed)
+
+        # Row storage, grown by doubling
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.count = 0
+        self.row_of = {} # External ID -> row
+
+        # IVF state
+        self.centroids = None
+        self.lists = []
+
+        # HNSW state
+        self.graph = [] # Level -> (capacity, max_neighbors) int32 array, -1 = empty slot
+        self.levels = np.zeros(0, dtype=np.int32)
+        self.entry_point = -1
+        self.max_level = -1
+
+        self.metadata_store = {} # External ID -> {text, metadata, vector}
+
+    # Storage
+
+    def _reserve(self, n):
+        capacity = len(self.vectors)
+        if self.count + n <= capacity:
+            return
+        new_capacity = max(self.count + n, 2 * capacity, 16)
+        grow = new_capacity - capacity
+        self.vectors = np.vstack([self.vectors, np.zeros((grow, self.dim), dtype=np.float32)])
+        self.norms = np.concatenate([self.norms, np.zeros(grow, dtype=np.float32)])
+        self.ids = np.concatenate([self.ids, np.zeros(grow, dtype=np.int64)])
+        self.deleted = np.concatenate([self.deleted, np.zeros(grow, dtype=bool)])
+        self.levels = np.concatenate([self.levels, np.zeros(grow, dtype=np.int32)])
+        self.graph = [
+            np.vstack([adjacency, np.full((grow, adjacency.shape[1]), -1, dtype=np.int32)])
+            for adjacency in self.graph
+        ]
+
+    def _distances(self, query, rows):
+        # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2 with the row norms cached
+        d = self.norms[rows] - 2 * (self.vectors[rows] @ query) + query @ query
+        return np.maximum(d, 0)
+
+    # IVF
+
+    def _kmeans(self, vectors):
+        k = min(self.nlist, len(vectors))
+        centroids = vectors[self.rng.choice(len(vectors), k, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assignments = self._assign(vectors, centroids)
+            # Mean of each cluster in one pass; empty clusters keep their centroid
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            counts = np.bincount(assignments, minlength=k)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        return centroids
+
+    @staticmethod
+    def _assign(vectors, centroids):
+        d = (centroids ** 2).sum(1)[None, :] - 2 * vectors @ centroids.T
+        return d.argmin(1)
+
+    def _ivf_add(self, rows):
+        if self.centroids is None:
+            # Trained once on the first batch
+            self.centroids = self._kmeans(self.vectors[rows])
+            self.lists = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        assignments = self._assign(self.vectors[rows], self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        for c in range(len(self.centroids)):
+            members = rows[order[bounds[c]:bounds[c + 1]]]
+            if len(members):
+                self.lists[c] = np.concatenate([self.lists[c], members])
+
+    def _ivf_search(self, query, k):
+        d = (self.centroids ** 2).sum(1) - 2 * self.centroids @ query
+        probes = np.argsort(d)[:self.nprobe]
+        rows = np.concatenate([self.lists[c] for c in probes])
+        rows = rows[~self.deleted[rows]]
+        return self._top_k(query, rows, k)
+
+    # HNSW
+
+    def _max_neighbors(self, level):
+        return 2 * self.m if level == 0 else self.m
+
+    def _search_layer(self, query, entry_points, ef, level):
+        adjacency = self.graph[level]
+        visited = set(entry_points)
+        dists = self._distances(query, np.array(entry_points))
+        candidates = [(d, r) for d, r in zip(dists.tolist(), entry_points)]
+        heapq.heapify(candidates) # Closest first
+        results = [(-d, r) for d, r in candidates] # Furthest first
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            d, row = heapq.heappop(candidates)
+            if d > -results[0][0]:
+                break
+            neighbors = adjacency[row]
+            neighbors = [n for n in neighbors[neighbors >= 0].tolist() if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            # One distance evaluation per expansion for all unvisited neighbors
+            for nd, n in zip(self._distances(query, np.array(neighbors)).tolist(), neighbors):
+                if len(results) < ef or nd < -results[0][0]:
+                    heapq.heappush(candidates, (nd, n))
+                    heapq.heappush(results, (-nd, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-d, r) for d, r in results)
+
+    def _select_neighbors(self, candidates, max_neighbors):
+        # Heuristic from the HNSW paper: keep a candidate only if it is closer to
+        # the query than to every neighbor already selected
+        if len(candidates) <= max_neighbors:
+            return [r for _, r in candidates]
+        rows = np.array([r for _, r in candidates])
+        dists = np.array([d for d, _ in candidates])
+        vectors = self.vectors[rows]
+        pairwise = self.norms[rows][:, None] - 2 * vectors @ vectors.T + self.norms[rows][None, :]
+
+        # closest[i]: distance from candidate i to its nearest selected neighbor
+        closest = np.full(len(rows), np.inf, dtype=np.float32)
+        selected = []
+        for i in range(len(rows)):
+            if closest[i] >= dists[i]:
+                selected.append(i)
+                if len(selected) == max_neighbors:
+                    break
+                closest = np.minimum(closest, pairwise[i])
+        if len(selected) < max_neighbors:
+            # Fill remaining slots with the closest skipped candidates
+            skipped = [i for i in range(len(rows)) if i not in selected]
+            selected += skipped[:max_neighbors - len(selected)]
+        return rows[selected].tolist()
+
+    def _connect(self, row, neighbor, level):
+        adjacency = self.graph[level]
+        links = adjacency[neighbor]
+        free = np.flatnonzero(links < 0)
+        if len(free):
+            links[free[0]] = row
+            return
+        # Full: re-select among the existing links plus the new one
+        current = np.append(links, row)
+        d = self._distances(self.vectors[neighbor], current)
+        order = np.argsort(d)
+        kept = self._select_neighbors(list(zip(d[order].tolist(), current[order].tolist())), len(links))
+        adjacency[neighbor] = -1
+        adjacency[neighbor, :len(kept)] = kept
+
+    def _hnsw_insert(self, row):
+        level = int(-np.log(1.0 - self.rng.random()) * self.level_mult)
+        self.levels[row] = level
+        capacity = len(self.vectors)
+        while len(self.graph) <= level:
+            self.graph.append(np.full((capacity, self._max_neighbors(len(self.graph))), -1, dtype=np.int32))
+
+        if self.entry_point < 0:
+            self.entry_point = row
+            self.max_level = level
+            return
+
+        query = self.vectors[row]
+        entry = [self.entry_point]
+        # Greedy descent through the levels above the new node
+        for l in range(self.max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, l)[0][1]]
+
+        for l in range(min(level, self.max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, l)
+            neighbors = self._select_neighbors(candidates, self._max_neighbors(l))
+            self.graph[l][row, :len(neighbors)] = neighbors
+            for neighbor in neighbors:
+                self._connect(row, neighbor, l)
+            entry = [r for _, r in candidates]
+
+        if level > self.max_level:
+            self.entry_point = row
+            self.max_level = level
+
+    def _hnsw_search(self, query, k):
+        entry = [self.entry_point]
+        for l in range(self.max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, l)[0][1]]
+        ef = max(self.ef_search, k)
+        while True:
+            results = [(d, r) for d, r in self._search_layer(query, entry, ef, 0) if not self.deleted[r]]
+            # Deleted nodes stay in the graph for routing; widen the search if they
+            # crowd out live results
+            if len(results) >= k or ef >= self.count:
+                return results[:k]
+            ef *= 2
+
+    # Shared
+
+    def _top_k(self, query, rows, k):
+        if len(rows) == 0:
+            return []
+        d = self._distances(query, rows)
+        top = np.argpartition(d, k - 1)[:k] if len(d) > k else np.arange(len(d))
+        top = top[np.argsort(d[top])]
+        return list(zip(d[top].tolist(), rows[top].tolist()))
+
+    def add(self, ids, vectors, texts, metadatas):
+        vectors = np.array(vectors).astype('float32')
+        ids = np.array(ids).astype('int64')
+
+        self._reserve(len(ids))
+        rows = np.arange(self.count, self.count + len(ids))
+        self.vectors[rows] = vectors
+        self.norms[rows] = (vectors ** 2).sum(1)
+        self.ids[rows] = ids
+        self.count += len(ids)
+        for row, id_val in zip(rows.tolist(), ids.tolist()):
+            self.row_of[id_val] = row
+
+        # Add to index
+        if self.mode == "ivf":
+            self._ivf_add(rows)
+        elif self.mode == "hnsw":
+            for row in rows.tolist():
+                self._hnsw_insert(row)
+
+        # Add to metadata store
+        for i, id_val in enumerate(ids.tolist()):
+            self.metadata_store[id_val] = {
+                "text": texts[i],
+                "metadata": metadatas[i],
+                "vector": vectors[i]
+            }
+
+        print(f"Added {len(ids)} items.")
+
+    def search(self, query_vector, k=3):
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        if self.count == 0:
+            return []
+        if self.mode == "ivf":
+            hits = self._ivf_search(query_vector, k)
+        elif self.mode == "hnsw":
+            hits = self._hnsw_search(query_vector, k)
+        else:
+            rows = np.flatnonzero(~self.deleted[:self.count])
+            hits = self._top_k(query_vector, rows, k)
+
+        results = []
+        for dist, row in hits:
+            idx = int(self.ids[row])
+            item = self.metadata_store.get(idx)
+            if item:
+                results.append({
+                    "id": idx,
+                    "distance": float(dist),
+                    "text": item["text"],
+                    "metadata": item["metadata"]
+                })
+        return results
+
+    def search_by_metadata(self, key, value):
+        results = []
+        for id_val, item in self.metadata_store.items():
+            if item["metadata"].get(key) == value:
+                results.append({
+                    "id": id_val,
+                    "text": item["text"],
+                    "metadata": item["metadata"]
+                })
+        return results
+
+    def update_metadata(self, id_val, new_metadata):
+        if id_val in self.metadata_store:
+            self.metadata_store[id_val]["metadata"] = new_metadata
+            print(f"Updated metadata for ID {id_val}")
+            return True
+        return False
+
+    def delete(self, id_val):
+        # Rows are only marked deleted; IVF lists and the HNSW graph keep them
+        row = self.row_of.pop(id_val, None)
+        if row is None:
+            print(f"Deletion failed: ID {id_val} not found")
+            return False
+        self.deleted[row] = True
+        del self.metadata_store[id_val]
+        print(f"Deleted ID {id_val}")
+        return True
+
+    def save(self):
+        state = {k: v for k, v in self.__dict__.items() if k != "metadata_store"}
+        with open(self.index_path, 'wb') as f:
+            pickle.dump(state, f)
+        with open(self.metadata_path, 'wb') as f:
+            pickle.dump(self.metadata_store, f)
+        print("Index saved.")
+
+    def load(self):
+        if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
+            with open(self.index_path, 'rb') as f:
+                self.__dict__.update(pickle.load(f))
+            with open(self.metadata_path, 'rb') as f:
+                self.metadata_store = pickle.load(f)
+            print("Index loaded.")
+
+def benchmark(data, args, k=3):
+    # Build every mode (and Faiss, if installed) on the same vectors, then
+    # compare build time, query latency and recall against exact search
+    ids = [item["id"] for item in data]
+    vectors = np.array([item["vector"] for item in data], dtype=np.float32)
+    texts = [item["text"] for item in data]
+    metadatas = [item["metadata"] for item in data]
+    queries = vectors[:args.queries]
+
+    exact = None
+    for mode in ["flat", "ivf", "hnsw"]:
+        store = NumpyStore(vectors.shape[1], mode=mode, nlist=args.nlist, nprobe=args.nprobe,
+                           m=args.m, ef_construction=args.ef_construction, ef_search=args.ef_search)
+        start = time.perf_counter()
+        store.add(ids, vectors, texts, metadatas)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = [[r["id"] for r in store.search(q, k)] for q in queries]
+        latency = (time.perf_counter() - start) / len(queries)
+
+        if exact is None:
+            exact = found
+        recall = np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)])
+        print(f"numpy {mode:5s}: build {build:.3f}s, {latency * 1000:.3f} ms/query, recall@{k} {recall:.3f}")
+
+    try:
+        import faiss
+    except ImportError:
+        print("faiss not installed, skipping comparison.")
+        return
+
+    for name, index in [("flat", faiss.IndexFlatL2(vectors.shape[1])),
+                        ("hnsw", faiss.IndexHNSWFlat(vectors.shape[1], args.m))]:
+        if name == "hnsw":
+            index.hnsw.efConstruction = args.ef_construction
+            index.hnsw.efSearch = args.ef_search
+        start = time.perf_counter()
+        index.add(vectors)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [index.search(q[None, :], k)[1][0] for q in queries]
+        latency = (time.perf_counter() - start) / len(queries)
+        recall = np.mean([len({ids[i] for i in f} & set(e)) / len(e) for f, e in zip(found, exact)])
+        print(f"faiss {name:5s}: build {build:.3f}s, {latency * 1000:.3f} ms/query, recall@{k} {recall:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pure-NumPy vector engine")
+    parser.add_argument("--mode", choices=["flat", "ivf", "hnsw"], default="hnsw")
+    parser.add_argument("--nlist", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, default=50)
+    parser.add_argument("--benchmark", action="store_true", help="Compare all modes (and Faiss) on the dataset")
+    parser.add_argument("--queries", type=int, default=100, help="Queries used by --benchmark")
+    args = parser.parse_args()
+
+    # Load dataset
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    if args.benchmark:
+        benchmark(data, args)
+        return
+
+    dim = len(data[0]["vector"])
+    store = NumpyStore(dim, mode=args.mode, nlist=args.nlist, nprobe=args.nprobe,
+                       m=args.m, ef_construction=args.ef_construction, ef_search=args.ef_search)
+
+    # 1. Add Data
+    ids = [item["id"] for item in data]
+    vectors = [item["vector"] for item in data]
+    texts = [item["text"] for item in data]
+    metadatas = [item["metadata"] for item in data]
+
+    store.add(ids, vectors, texts, metadatas)
+
+    # 2. Search (Vector)
+    print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
+    query_vector = data[0]["vector"]
+    results = store.search(query_vector, k=3)
+    for res in results:
+        print(f"ID: {res['id']}, Distance: {res['distance']:.4f}, Text: {res['text']}, Metadata: {res['metadata']}")
+
+    # 3. Search (Metadata)
+    print("\n--- Metadata Search Results (Category == 'tech') ---")
+    results = store.search_by_metadata("category", "tech")
+    for res in results:
+        print(f"ID: {res['id']}, Text: {res['text']}, Metadata: {res['metadata']}")
+
+    # 4. Update Metadata
+    print("\n--- Updating Metadata ---")
+    item_id = data[0]["id"]
+    print(f"Before: {store.metadata_store[item_id]['metadata']}")
+    store.update_metadata(item_id, {"category": "food"})
+    print(f"After: {store.metadata_store[item_id]['metadata']}")
+
+    # 5. Delete
+    print("\n--- Deleting Item ---")
+    store.delete(item_id)
+
+    # Verify
+    if item_id not in store.metadata_store:
+        print("Item deleted from metadata store.")
+
+    # Verify search doesn't return it
+    results = store.search(query_vector, k=3)
+    found = any(r['id'] == item_id for r in results)
+    if not found:
+        print("Item not found in vector search.")
+
+if __name__ == "__main__":
+    main()
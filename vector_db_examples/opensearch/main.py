@@ -1,8 +1,131 @@
-from opensearchpy import OpenSearch
+from opensearchpy import OpenSearch, helpers
+import argparse
 import json
 import os
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OpenSearch k-NN example")
+    parser.add_argument("--engine", choices=["faiss", "lucene", "nmslib"], default="faiss")
+    parser.add_argument("--method", choices=["hnsw", "ivf"], default="hnsw", help="ivf requires the faiss engine")
+    parser.add_argument("--encoder", choices=["none", "fp16", "pq"], default="none",
+                        help="faiss encoder: fp16 scalar quantization or product quantization")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per node")
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--nlist", type=int, default=4, help="IVF lists (capped at the number of training vectors)")
+    parser.add_argument("--nprobes", type=int, default=2)
+    parser.add_argument("--pq-m", type=int, default=8, help="PQ sub-vectors (must divide the dimension)")
+    parser.add_argument("--pq-code-size", type=int, default=8, help="PQ bits per sub-vector code (IVF: capped at log2 of the number of training vectors)")
+    parser.add_argument("--train-timeout", type=float, default=300, help="Seconds to wait for IVF/PQ model training")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--thread-count", type=int, default=4, help="Parallel bulk workers")
+    return parser.parse_args()
+
+def knn_method(args, num_vectors):
+    if args.engine != "faiss" and (args.method == "ivf" or args.encoder != "none"):
+        raise ValueError("IVF and the fp16/pq encoders require the faiss engine")
+
+    if args.method == "hnsw":
+        parameters = {"m": args.m, "ef_construction": args.ef_construction}
+        if args.engine == "faiss":
+            parameters["ef_search"] = args.ef_search
+    else:
+        parameters = {"nlist": min(args.nlist, num_vectors), "nprobes": args.nprobes}
+
+    if args.encoder == "fp16":
+        parameters["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+    elif args.encoder == "pq":
+        # Training needs at least 2^code_size vectors per sub-quantizer
+        code_size = args.pq_code_size
+        if num_vectors < 2 ** code_size:
+            if args.method == "hnsw":
+                raise ValueError(f"HNSW with PQ uses {code_size}-bit codes and needs at least "
+                                 f"{2 ** code_size} training vectors, got {num_vectors}")
+            code_size = max(1, num_vectors.bit_length() - 1)
+        parameters["encoder"] = {"name": "pq", "parameters": {"m": args.pq_m, "code_size": code_size}}
+
+    return {
+        "name": args.method,
+        "engine": args.engine,
+        "space_type": "l2",
+        "parameters": parameters
+    }
+
+def knn_query(query_vector, k, args, category=None):
+    knn = {"vector": query_vector, "k": k}
+    # Query-time search parameters apply to every engine; the index-level
+    # ef_search is only a default (and lucene has none)
+    if args.method == "hnsw":
+        knn["method_parameters"] = {"ef_search": args.ef_search}
+    else:
+        knn["method_parameters"] = {"nprobes": args.nprobes}
+    # The filter inside the knn clause is applied during the ANN search (efficient
+    # filtering with the faiss and lucene engines), so k results are still returned
+    if category:
+        knn["filter"] = {"term": {"category": category}}
+    return {"size": k, "query": {"knn": {"vector": knn}}}
+
+def train_model(client, model_id, training_index, dim, method, timeout):
+    # IVF and PQ need a trained model; it is trained from vectors already indexed
+    # in a plain (untrained) index and then referenced by model_id in the mapping.
+    try:
+        client.transport.perform_request("DELETE", f"/_plugins/_knn/models/{model_id}")
+    except Exception:
+        pass
+
+    client.transport.perform_request("POST", f"/_plugins/_knn/models/{model_id}/_train", body={
+        "training_index": training_index,
+        "training_field": "vector",
+        "dimension": dim,
+        "method": method
+    })
+
+    start = time.perf_counter()
+    while True:
+        model = client.transport.perform_request("GET", f"/_plugins/_knn/models/{model_id}")
+        if model["state"] == "created":
+            break
+        # A zombie model lost its training node and will never finish
+        if model["state"] in ("failed", "zombie"):
+            raise RuntimeError(f"Model training {model['state']}: {model.get('error')}")
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Model '{model_id}' still '{model['state']}' after {timeout:.0f}s")
+        time.sleep(0.5)
+    print(f"Model '{model_id}' trained in {time.perf_counter() - start:.2f}s.")
+
+def generate_actions(data, index_name):
+    for item in data:
+        yield {
+            "_index": index_name,
+            "_id": str(item["id"]),
+            "_source": {
+                "vector": item["vector"],
+                "text": item["text"],
+                "category": item["metadata"]["category"]
+            }
+        }
+
+def bulk_load(client, index_name, data, args):
+    indexed = 0
+    start = time.perf_counter()
+    for ok, info in helpers.parallel_bulk(
+        client,
+        generate_actions(data, index_name),
+        thread_count=args.thread_count,
+        chunk_size=args.chunk_size,
+        raise_on_error=False
+    ):
+        if ok:
+            indexed += 1
+        else:
+            print(f"Failed to index: {info}")
+    client.indices.refresh(index=index_name)
+    print(f"Indexed {indexed} documents in {time.perf_counter() - start:.2f}s.")
 
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to OpenSearch...")
     client = OpenSearch(
@@ -13,7 +136,7 @@ def main():
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -24,22 +147,35 @@ def main():
     if client.indices.exists(index_name):
         client.indices.delete(index_name)
 
+    method = knn_method(args, len(data))
+    if method["name"] == "ivf" or args.encoder == "pq":
+        # Train on the dataset itself through a temporary HNSW/faiss index
+        training_index = f"{index_name}_train"
+        if client.indices.exists(training_index):
+            client.indices.delete(training_index)
+        client.indices.create(index=training_index, body={
+            "settings": {"index": {"knn": True}},
+            "mappings": {"properties": {"vector": {"type": "knn_vector", "dimension": dim}}}
+        })
+        bulk_load(client, training_index, data, args)
+        train_model(client, f"{index_name}_model", training_index, dim, method, args.train_timeout)
+        client.indices.delete(training_index)
+        vector_field = {"type": "knn_vector", "model_id": f"{index_name}_model"}
+    else:
+        vector_field = {"type": "knn_vector", "dimension": dim, "method": method}
+
+    index_settings = {"knn": True}
+    if args.engine == "nmslib":
+        # nmslib only reads ef_search from the index setting
+        index_settings["knn.algo_param.ef_search"] = args.ef_search
+
     index_body = {
         "settings": {
-            "index": {
-                "knn": True
-            }
+            "index": index_settings
         },
         "mappings": {
             "properties": {
-                "vector": {
-                    "type": "knn_vector",
-                    "dimension": dim,
-                    "method": {
-                         "name": "hnsw",
-                         "engine": "nmslib"
-                    }
-                },
+                "vector": vector_field,
                 "text": {"type": "text"},
                 "category": {"type": "keyword"}
             }
@@ -47,38 +183,25 @@ def main():
     }
 
     client.indices.create(index=index_name, body=index_body)
-    print(f"Index '{index_name}' created.")
+    print(f"Index '{index_name}' created ({args.engine} {args.method}, encoder: {args.encoder}).")
 
     # 2. Index Documents
     print(f"Indexing {len(data)} documents...")
-    for item in data:
-        doc = {
-            "vector": item["vector"],
-            "text": item["text"],
-            "category": item["metadata"]["category"]
-        }
-        client.index(index=index_name, id=str(item["id"]), body=doc)
-
-    client.indices.refresh(index=index_name)
+    bulk_load(client, index_name, data, args)
     print("Documents indexed.")
 
     # 3. Search (Vector Search via kNN)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
     query_vector = data[0]["vector"]
 
-    query = {
-        "size": 3,
-        "query": {
-            "knn": {
-                "vector": {
-                    "vector": query_vector,
-                    "k": 3
-                }
-            }
-        }
-    }
+    response = client.search(index=index_name, body=knn_query(query_vector, 3, args))
 
-    response = client.search(index=index_name, body=query)
+    for hit in response['hits']['hits']:
+        print(f"ID: {hit['_id']}, Score: {hit['_score']:.4f}, Text: {hit['_source']['text']}, Category: {hit['_source']['category']}")
+
+    # Filtered Vector Search
+    print("\n--- Filtered Vector Search Results (Top 3 with Category == 'tech') ---")
+    response = client.search(index=index_name, body=knn_query(query_vector, 3, args, category="tech"))
 
     for hit in response['hits']['hits']:
         print(f"ID: {hit['_id']}, Score: {hit['_score']:.4f}, Text: {hit['_source']['text']}, Category: {hit['_source']['category']}")
@@ -0,0 +1,170 @@
+import argparse
+import os
+import queue
+import threading
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from ingest import BACKENDS, Pipeline, StageStats, read_items
+
+# Embed-and-index without an intermediate file: texts are read in a background
+# thread, grouped into encoder batches bounded by size and by wait time, sorted
+# by length within a window so each batch pads less, encoded, and handed to the
+# ingestion pipeline as they come out of the model.
+
+_DONE = object()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Streaming embed-and-index")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="null")
+    parser.add_argument("--source", default=None,
+                        help="Text file (one text per line, optionally 'category<TAB>text') or JSON Lines "
+                             "with 'text' and 'category'; default: the dataset texts, replayed --repeat times")
+    parser.add_argument("--repeat", type=int, default=100, help="Replays of the dataset texts without --source")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--device", default=None, help="e.g. cpu, cuda (default: sentence-transformers' choice)")
+    parser.add_argument("--max-batch", type=int, default=64, help="Texts per encoder call")
+    parser.add_argument("--max-wait", type=float, default=0.05,
+                        help="Seconds a partial batch waits for more texts before being encoded")
+    parser.add_argument("--sort-window", type=int, default=8,
+                        help="Batches' worth of texts sorted by length together (1 disables sorting)")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--serializers", type=int, default=2)
+    return parser.parse_args()
+
+def read_texts(path):
+    if path.endswith(".jsonl"):
+        for record in read_items(path):
+            yield record["text"], record.get("category", "none")
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            category, sep, text = line.partition("\t")
+            yield (text, category) if sep else (line, "none")
+
+def dataset_texts(data_path, repeat):
+    items = list(read_items(data_path))
+    for _ in range(repeat):
+        for item in items:
+            yield item["text"], item["metadata"]["category"]
+
+def prefetch(source, depth):
+    # The source is read in its own thread, so a slow reader only shows up as
+    # time-bounded partial batches. Called from dynamic_batches, so the thread
+    # only starts once the pipeline begins pulling batches.
+    q = queue.Queue(maxsize=depth)
+
+    def run():
+        # A failing source is passed on to the consumer, which re-raises it,
+        # rather than leaving it waiting for a record that never comes
+        try:
+            for record in source:
+                q.put(record)
+        except BaseException as e:
+            q.put(e)
+        finally:
+            q.put(_DONE)
+
+    threading.Thread(target=run, daemon=True).start()
+    return q
+
+def dynamic_batches(source, max_batch, max_wait, sort_window):
+    """Yield lists of (text, category), at most max_batch long.
+
+    Texts are collected until sort_window batches are buffered or max_wait has
+    passed since the first one arrived, then sorted by length and split, so
+    texts of similar length share a batch.
+    """
+    window = max_batch * sort_window
+    q = prefetch(source, window * 2)
+    done = False
+    while not done:
+        pending = []
+        deadline = None
+        while len(pending) < window:
+            timeout = None if deadline is None else deadline - time.perf_counter()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                record = q.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if record is _DONE:
+                done = True
+                break
+            if isinstance(record, BaseException):
+                raise record
+            pending.append(record)
+            if deadline is None:
+                deadline = time.perf_counter() + max_wait
+        if sort_window > 1:
+            pending.sort(key=lambda record: len(record[0]))
+        for start in range(0, len(pending), max_batch):
+            yield pending[start:start + max_batch]
+
+def embed(model, batches, stats, padding):
+    """Encode each batch and yield dataset items with float32 vectors."""
+    next_id = 1
+    for batch in batches:
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        busy = time.perf_counter() - start
+
+        # Share of each batch that is real text rather than padding, with
+        # character length standing in for token length
+        lengths = [len(text) for text in texts]
+        padding.append(sum(lengths) / (max(lengths) * len(lengths)) if max(lengths) else 1.0)
+        stats.record(len(texts), busy)
+
+        for (text, category), vector in zip(batch, vectors):
+            yield {
+                "id": next_id,
+                "text": text,
+                "metadata": {"category": category},
+                "vector": vector.astype(np.float32)
+            }
+            next_id += 1
+
+def main():
+    args = parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if args.source:
+        source = read_texts(args.source)
+    else:
+        data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+        source = dataset_texts(data_path, args.repeat)
+
+    # Serializer processes are forked first, before the model brings in its
+    # thread pools
+    backend = BACKENDS[args.backend]()
+    pipeline = Pipeline(backend, serializers=args.serializers, writers=args.writers, shard_size=args.max_batch)
+    pipeline.start_serializers()
+
+    model = SentenceTransformer(args.model, device=args.device)
+    dim = model.get_sentence_embedding_dimension()
+    backend.setup(dim)
+    print(f"Embedding with {args.model} (dimension {dim}) into {args.backend}...")
+
+    embed_stats = StageStats("embed")
+    padding = []
+    batches = dynamic_batches(source, args.max_batch, args.max_wait, args.sort_window)
+
+    # The pipeline's reader thread drives the encoder, so embedding overlaps
+    # with serialization and writes
+    elapsed = pipeline.run(embed(model, batches, embed_stats, padding))
+    backend.finish()
+
+    total = pipeline.stats["write"].items
+    print(f"\nEmbedded and indexed {total} documents in {elapsed:.2f}s ({total / elapsed:.0f} docs/s)")
+    embed_stats.report(elapsed, 1)
+    print(f"{'':10s}  mean batch {embed_stats.items / max(1, embed_stats.batches):.1f} texts, "
+          f"{np.mean(padding):.0%} of each batch is text rather than padding")
+    pipeline.report(elapsed)
+
+if __name__ == "__main__":
+    main()
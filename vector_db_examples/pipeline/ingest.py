@@ -0,0 +1,533 @@
+import json
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Producer/consumer ingestion shared by the backends:
+#
+#   source -> [shard queue] -> serializers -> [record queue] -> writer threads
+#
+# Both queues are bounded, so a slow stage blocks the one before it instead of
+# buffering the whole dataset in memory. Each writer holds its own connection.
+# Batch size and the number of batches in flight are adjusted from the
+# observed write latency.
+#
+# Serialization is CPU-bound Python, so by default each serializer thread hands
+# its shard to a worker process and only waits on the result; with threads
+# alone the GIL lets one serializer run at a time. Shards are pickled both
+# ways, which is the price for the parallelism.
+
+_DONE = object()
+
+# Per-process backend used by the serializer worker processes
+_worker_backend = None
+
+def _init_serializer(backend_class):
+    global _worker_backend
+    _worker_backend = backend_class()
+
+def _prepare(shard):
+    return _worker_backend.prepare(shard)
+
+class StageStats:
+    """Items, busy time and time blocked on a full downstream queue, per stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, items, busy, blocked=0.0):
+        with self.lock:
+            self.items += items
+            self.batches += 1
+            self.busy += busy
+            self.blocked += blocked
+
+    def report(self, elapsed, workers):
+        rate = self.items / elapsed if elapsed else 0.0
+        utilization = self.busy / (elapsed * workers) if elapsed else 0.0
+        print(f"{self.name:10s}: {self.items} items in {self.batches} batches, {rate:.0f} items/s, "
+              f"busy {utilization:.0%} of {workers} worker(s), blocked {self.blocked:.2f}s on a full queue")
+
+class AdaptiveController:
+    """AIMD on batch size and in-flight writes, steered by a target write latency.
+
+    Writes under half the target grow the batch and allow one more write in
+    flight; writes over the target or failures halve the batch and allow one
+    fewer.
+    """
+
+    def __init__(self, batch_size, min_batch, max_batch, max_in_flight, target_latency):
+        self.batch_size = batch_size
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.limit = max(1, max_in_flight // 2)
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= self.limit:
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, ok=True):
+        with self.cond:
+            self.in_flight -= 1
+            if not ok or latency > self.target_latency:
+                self.batch_size = max(self.min_batch, self.batch_size // 2)
+                self.limit = max(1, self.limit - 1)
+            elif latency < self.target_latency / 2:
+                self.batch_size = min(self.max_batch, int(self.batch_size * 1.25) + 1)
+                self.limit = min(self.max_in_flight, self.limit + 1)
+            self.cond.notify_all()
+
+def read_items(path):
+    # JSON Lines is streamed a line at a time; a JSON array is loaded whole
+    if path.endswith(".jsonl"):
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r') as f:
+            yield from json.load(f)
+
+def repeat_items(items, repeat):
+    # Re-use a small dataset under fresh ids to get a meaningful load volume
+    items = list(items)
+    for r in range(repeat):
+        for item in items:
+            yield dict(item, id=r * len(items) + item["id"])
+
+class Pipeline:
+    def __init__(self, backend, serializers=2, writers=4, shard_size=256, queue_depth=8,
+                 batch_size=256, min_batch=32, max_batch=4096, max_in_flight=None,
+                 target_latency=0.5, retries=3, processes=True):
+        self.backend = backend
+        self.serializers = serializers
+        self.processes = processes
+        self.executor = None
+        self.writers = writers
+        self.shard_size = shard_size
+        self.shards = queue.Queue(maxsize=queue_depth)
+        self.records = queue.Queue(maxsize=queue_depth)
+        self.controller = AdaptiveController(batch_size, min_batch, max_batch,
+                                             max_in_flight or writers, target_latency)
+        self.retries = retries
+        self.stats = {name: StageStats(name) for name in ("read", "serialize", "write")}
+        self.stop = threading.Event()
+        self.errors = []
+
+    def _put(self, q, item):
+        # Blocks while the queue is full (backpressure), but wakes up to notice
+        # a failure elsewhere in the pipeline
+        start = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return time.perf_counter() - start
+            except queue.Full:
+                continue
+        raise RuntimeError("pipeline stopped")
+
+    def _get(self, q, block=True):
+        # Non-blocking gets give up after a short wait and return None
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1 if block else 0.05)
+            except queue.Empty:
+                if not block:
+                    return None
+        raise RuntimeError("pipeline stopped")
+
+    def _guard(self, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            if not self.stop.is_set():
+                self.errors.append(e)
+            self.stop.set()
+
+    def _read(self, items):
+        stats = self.stats["read"]
+        shard = []
+        start = time.perf_counter()
+        for item in items:
+            shard.append(item)
+            if len(shard) == self.shard_size:
+                busy = time.perf_counter() - start
+                stats.record(len(shard), busy, self._put(self.shards, shard))
+                shard = []
+                start = time.perf_counter()
+        if shard:
+            stats.record(len(shard), time.perf_counter() - start, self._put(self.shards, shard))
+        for _ in range(self.serializers):
+            self._put(self.shards, _DONE)
+
+    def _serialize(self):
+        stats = self.stats["serialize"]
+        while True:
+            shard = self._get(self.shards)
+            if shard is _DONE:
+                return
+            start = time.perf_counter()
+            if self.executor:
+                records = self.executor.submit(_prepare, shard).result()
+            else:
+                records = self.backend.prepare(shard)
+            busy = time.perf_counter() - start
+            stats.record(len(records), busy, self._put(self.records, records))
+
+    def _write(self, index):
+        stats = self.stats["write"]
+        conn = self.backend.connect(index)
+        buffer = []
+        done = False
+        try:
+            while True:
+                # Fill up to the current batch size; flush early if the record
+                # queue runs dry so a slow producer does not stall the writer
+                size = self.controller.batch_size
+                while not done and len(buffer) < size:
+                    records = self._get(self.records, block=not buffer)
+                    if records is None:
+                        break
+                    if records is _DONE:
+                        done = True
+                    else:
+                        buffer.extend(records)
+                if not buffer:
+                    return
+                batch, buffer = buffer[:size], buffer[size:]
+                self._write_batch(conn, batch, stats)
+        finally:
+            self.backend.close(conn)
+
+    def _write_batch(self, conn, batch, stats):
+        for attempt in range(self.retries + 1):
+            self.controller.acquire()
+            start = time.perf_counter()
+            try:
+                self.backend.write(conn, batch)
+            except Exception:
+                self.controller.release(time.perf_counter() - start, ok=False)
+                if attempt == self.retries:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+                continue
+            latency = time.perf_counter() - start
+            self.controller.release(latency)
+            stats.record(len(batch), latency)
+            return
+
+    def start_serializers(self):
+        """Start the serializer worker processes, if not already running.
+
+        Forks where available, so call it before the process starts any
+        threads of its own (e.g. by loading a model); run() calls it otherwise.
+        All workers of a fork-context pool start on the first submit.
+        """
+        if not self.processes or self.executor:
+            return
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.executor = ProcessPoolExecutor(self.serializers, mp_context=context,
+                                            initializer=_init_serializer, initargs=(type(self.backend),))
+        self.executor.submit(_prepare, []).result()
+
+    def run(self, items):
+        self.start_serializers()
+        try:
+            return self._run(items)
+        finally:
+            if self.executor:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
+
+    def _run(self, items):
+        threads = [threading.Thread(target=self._guard, args=(self._read, items))]
+        threads += [threading.Thread(target=self._guard, args=(self._serialize,))
+                    for _ in range(self.serializers)]
+        writers = [threading.Thread(target=self._guard, args=(self._write, i)) for i in range(self.writers)]
+
+        start = time.perf_counter()
+        for thread in threads + writers:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Serializers are finished: one end marker per writer
+        if not self.stop.is_set():
+            for _ in range(self.writers):
+                self._guard(self._put, self.records, _DONE)
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if self.errors:
+            raise self.errors[0]
+        return elapsed
+
+    def report(self, elapsed):
+        workers = {"read": 1, "serialize": self.serializers, "write": self.writers}
+        for name, stats in self.stats.items():
+            stats.report(elapsed, workers[name])
+        print(f"Serializers ran in {'worker processes' if self.processes else 'threads (one at a time under the GIL)'}")
+        print(f"Final batch size {self.controller.batch_size}, "
+              f"in-flight limit {self.controller.limit}/{self.controller.max_in_flight}")
+
+# Backends. prepare() runs in the serializer threads and turns dataset items
+# into whatever the client sends; write() runs in a writer thread with that
+# writer's own connection from connect().
+
+class Backend:
+    name = None
+
+    def setup(self, dim):
+        pass
+
+    def connect(self, index):
+        return None
+
+    def prepare(self, items):
+        return items
+
+    def write(self, conn, batch):
+        pass
+
+    def close(self, conn):
+        pass
+
+    def finish(self):
+        pass
+
+class NullBackend(Backend):
+    """Serializes but sends nothing: the ceiling of the client side alone."""
+
+    name = "null"
+
+    def prepare(self, items):
+        return [np.asarray(item["vector"], dtype=np.float32).tobytes() for item in items]
+
+class PostgresBackend(Backend):
+    name = "postgres"
+    table = "pipeline_items"
+
+    def _connect(self):
+        import psycopg2
+        from pgvector.psycopg2 import register_vector
+        conn = psycopg2.connect(host="localhost", port="5432", user="postgres",
+                                password="password", dbname="vectordb")
+        conn.autocommit = True
+        register_vector(conn)
+        return conn
+
+    def setup(self, dim):
+        conn = self._connect()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {self.table}")
+            cur.execute(f"CREATE TABLE {self.table} (id bigint PRIMARY KEY, text text, "
+                        f"metadata jsonb, embedding vector({dim}))")
+        conn.close()
+
+    def connect(self, index):
+        return self._connect()
+
+    def prepare(self, items):
+        return [(item["id"], item["text"], json.dumps(item["metadata"]),
+                 np.asarray(item["vector"], dtype=np.float32)) for item in items]
+
+    def write(self, conn, batch):
+        from psycopg2.extras import execute_values
+        with conn.cursor() as cur:
+            execute_values(cur, f"INSERT INTO {self.table} (id, text, metadata, embedding) VALUES %s",
+                           batch, page_size=len(batch))
+
+    def close(self, conn):
+        conn.close()
+
+class RedisBackend(Backend):
+    name = "redis"
+    prefix = "pipeline:"
+    index_name = "pipeline_idx"
+
+    def __init__(self):
+        import redis
+        self.pool = redis.ConnectionPool(host='localhost', port=6379)
+
+    def setup(self, dim):
+        import redis
+        from redis.commands.search.field import TagField, VectorField
+        from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+        r = redis.Redis(connection_pool=self.pool)
+        try:
+            r.ft(self.index_name).dropindex(delete_documents=True)
+        except redis.exceptions.ResponseError:
+            pass
+        r.ft(self.index_name).create_index(
+            [TagField("category"),
+             VectorField("vector", "HNSW", {"TYPE": "FLOAT32", "DIM": dim, "DISTANCE_METRIC": "COSINE"})],
+            definition=IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+        )
+
+    def connect(self, index):
+        import redis
+        return redis.Redis(connection_pool=self.pool)
+
+    def prepare(self, items):
+        return [(f"{self.prefix}{item['id']}", {
+            "text": item["text"],
+            "category": item["metadata"]["category"],
+            "vector": np.asarray(item["vector"], dtype=np.float32).tobytes()
+        }) for item in items]
+
+    def write(self, conn, batch):
+        pipeline = conn.pipeline(transaction=False)
+        for key, mapping in batch:
+            pipeline.hset(key, mapping=mapping)
+        pipeline.execute()
+
+class QdrantBackend(Backend):
+    name = "qdrant"
+    collection_name = "pipeline_collection"
+
+    def _client(self):
+        from qdrant_client import QdrantClient
+        return QdrantClient(host="localhost", port=6333, grpc_port=6334, prefer_grpc=True)
+
+    def setup(self, dim):
+        from qdrant_client.http import models
+        client = self._client()
+        if client.collection_exists(self.collection_name):
+            client.delete_collection(self.collection_name)
+        client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+        )
+
+    def connect(self, index):
+        return self._client()
+
+    def prepare(self, items):
+        from qdrant_client.http import models
+        return [models.PointStruct(
+            id=item["id"],
+            vector=np.asarray(item["vector"], dtype=np.float32).tolist(),
+            payload={"text": item["text"], "category": item["metadata"]["category"]}
+        ) for item in items]
+
+    def write(self, conn, batch):
+        conn.upsert(collection_name=self.collection_name, points=batch, wait=True)
+
+    def close(self, conn):
+        conn.close()
+
+class ElasticsearchBackend(Backend):
+    name = "elasticsearch"
+    index_name = "pipeline_items"
+
+    def _client(self):
+        from elasticsearch import Elasticsearch
+        return Elasticsearch("http://localhost:9200", request_timeout=120)
+
+    def setup(self, dim):
+        es = self._client()
+        if es.indices.exists(index=self.index_name):
+            es.indices.delete(index=self.index_name)
+        es.indices.create(
+            index=self.index_name,
+            mappings={"properties": {
+                "text": {"type": "text"},
+                "category": {"type": "keyword"},
+                "vector": {"type": "dense_vector", "dims": dim, "index": True, "similarity": "cosine"}
+            }}
+        )
+        # No refreshes or replicas while loading; finish() puts back the
+        # index's explicit values, or null for unset ones so they return to
+        # the default (an explicit "1s" refresh would disable search-idle skipping)
+        explicit = es.indices.get_settings(index=self.index_name)[self.index_name]["settings"]["index"]
+        self.original_settings = {name: explicit.get(name)
+                                  for name in ("refresh_interval", "number_of_replicas")}
+        es.indices.put_settings(index=self.index_name,
+                                settings={"refresh_interval": "-1", "number_of_replicas": 0})
+
+    def connect(self, index):
+        return self._client()
+
+    def prepare(self, items):
+        return [{
+            "_index": self.index_name,
+            "_id": item["id"],
+            "_source": {
+                "text": item["text"],
+                "category": item["metadata"]["category"],
+                "vector": np.asarray(item["vector"], dtype=np.float32).tolist()
+            }
+        } for item in items]
+
+    def write(self, conn, batch):
+        from elasticsearch import helpers
+        helpers.bulk(conn, batch, chunk_size=len(batch), max_chunk_bytes=100 * 1024 * 1024)
+
+    def close(self, conn):
+        conn.close()
+
+    def finish(self):
+        es = self._client()
+        es.indices.put_settings(index=self.index_name, settings=self.original_settings)
+        es.indices.refresh(index=self.index_name)
+
+class MilvusBackend(Backend):
+    name = "milvus"
+    collection_name = "pipeline_collection"
+
+    def setup(self, dim):
+        from pymilvus import connections, utility, FieldSchema, CollectionSchema, DataType, Collection
+        connections.connect("default", host="localhost", port="19530")
+        if utility.has_collection(self.collection_name):
+            utility.drop_collection(self.collection_name)
+        fields = [
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+            FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=dim),
+            FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=100),
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=1000)
+        ]
+        Collection(self.collection_name, CollectionSchema(fields, "Pipeline ingestion"))
+
+    def connect(self, index):
+        # One connection alias per writer
+        from pymilvus import connections, Collection
+        alias = f"writer{index}"
+        connections.connect(alias, host="localhost", port="19530")
+        return alias, Collection(self.collection_name, using=alias)
+
+    def prepare(self, items):
+        # Row tuples here; write() transposes a batch into columns
+        return [(item["id"], np.asarray(item["vector"], dtype=np.float32),
+                 item["metadata"]["category"], item["text"]) for item in items]
+
+    def write(self, conn, batch):
+        _, collection = conn
+        ids, vectors, categories, texts = zip(*batch)
+        collection.insert([list(ids), np.vstack(vectors), list(categories), list(texts)])
+
+    def close(self, conn):
+        from pymilvus import connections
+        connections.disconnect(conn[0])
+
+    def finish(self):
+        from pymilvus import Collection
+        Collection(self.collection_name).flush()
+
+BACKENDS = {backend.name: backend for backend in (
+    NullBackend, PostgresBackend, RedisBackend, QdrantBackend, ElasticsearchBackend, MilvusBackend
+)}
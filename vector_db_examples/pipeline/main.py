@@ -0,0 +1,61 @@
+import argparse
+import os
+from ingest import BACKENDS, Pipeline, read_items, repeat_items
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parallel ingestion pipeline with backpressure")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="null",
+                        help="'null' serializes without sending, to measure the client side alone")
+    parser.add_argument("--repeat", type=int, default=1000,
+                        help="Times the dataset is replayed under new ids")
+    parser.add_argument("--serializers", type=int, default=2, help="Serialization workers")
+    parser.add_argument("--serializer-threads", action="store_true",
+                        help="Serialize in threads instead of worker processes: no pickling, but GIL-bound")
+    parser.add_argument("--writers", type=int, default=4, help="Writer threads, one connection each")
+    parser.add_argument("--shard-size", type=int, default=256, help="Items per shard read from the source")
+    parser.add_argument("--queue-depth", type=int, default=8, help="Shards buffered between stages")
+    parser.add_argument("--batch-size", type=int, default=256, help="Initial write batch size")
+    parser.add_argument("--min-batch", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Upper bound on concurrent writes (default: --writers)")
+    parser.add_argument("--target-latency", type=float, default=0.5,
+                        help="Write latency in seconds the batch size and in-flight limit are steered towards")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+
+    # Only the first item is read up front, for the vector dimension
+    dim = len(next(read_items(data_path))["vector"])
+    backend = BACKENDS[args.backend]()
+    backend.setup(dim)
+    print(f"Loading into {args.backend} (dimension {dim}) with {args.serializers} serializer(s) "
+          f"and {args.writers} writer(s)...")
+
+    pipeline = Pipeline(
+        backend,
+        serializers=args.serializers,
+        writers=args.writers,
+        shard_size=args.shard_size,
+        queue_depth=args.queue_depth,
+        batch_size=args.batch_size,
+        min_batch=args.min_batch,
+        max_batch=args.max_batch,
+        max_in_flight=args.max_in_flight,
+        target_latency=args.target_latency,
+        processes=not args.serializer_threads
+    )
+    items = repeat_items(read_items(data_path), args.repeat)
+    elapsed = pipeline.run(items)
+    backend.finish()
+
+    total = pipeline.stats["write"].items
+    print(f"\nIngested {total} items in {elapsed:.2f}s ({total / elapsed:.0f} items/s)")
+    pipeline.report(elapsed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from psycopg_pool import AsyncConnectionPool
+from pgvector.psycopg import register_vector_async
+import argparse
+import asyncio
+import json
+import numpy as np
+import os
+import time
+
+# Asyncio query path for the `items` table created by main.py (run it first).
+# Each connection sends its share of the KNN queries in psycopg pipeline mode,
+# so many statements are in flight per round trip, and vectors come back in
+# binary format decoded straight into numpy arrays by pgvector's loaders.
+
+DSN = "host=localhost port=5432 user=postgres password=password dbname=vectordb"
+
+KNN_SQL = """
+    SELECT id, text, metadata, embedding, embedding <=> %(q)s AS distance
+    FROM items
+    ORDER BY embedding <=> %(q)s
+    LIMIT %(k)s
+"""
+
+UPDATE_SQL = "UPDATE items SET metadata = metadata || %s::jsonb WHERE id = %s"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="pgvector asyncio pipelined query example")
+    parser.add_argument("--connections", type=int, default=8, help="Connections in the pool")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of KNN queries to run")
+    parser.add_argument("--pipeline-depth", type=int, default=64,
+                        help="Queries sent per pipeline sync on one connection")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--ef-search", type=int, default=40, help="hnsw.ef_search for every pooled connection")
+    return parser.parse_args()
+
+async def knn_pipeline(pool, queries, k):
+    # Send every query before reading any result; one sync per batch
+    async with pool.connection() as conn:
+        async with conn.pipeline() as p:
+            cursors = []
+            for query_vector in queries:
+                cur = conn.cursor(binary=True)
+                await cur.execute(KNN_SQL, {"q": query_vector, "k": k})
+                cursors.append(cur)
+            await p.sync()
+            return [await cur.fetchall() for cur in cursors]
+
+async def run_queries(pool, query_vectors, k, depth):
+    batches = [query_vectors[i:i + depth] for i in range(0, len(query_vectors), depth)]
+    # The pool hands out at most `connections` connections; the remaining
+    # batches wait for a free one.
+    results = await asyncio.gather(*(knn_pipeline(pool, batch, k) for batch in batches))
+    return [rows for batch in results for rows in batch]
+
+async def update_chunk(pool, updates):
+    # executemany runs in pipeline mode in psycopg 3
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.executemany(UPDATE_SQL, [(json.dumps(meta), item_id) for item_id, meta in updates])
+
+async def update_metadata(pool, updates, connections):
+    # One chunk per pooled connection, run concurrently like the KNN batches
+    size = max(1, -(-len(updates) // connections))
+    chunks = [updates[i:i + size] for i in range(0, len(updates), size)]
+    await asyncio.gather(*(update_chunk(pool, chunk) for chunk in chunks))
+
+async def main_async():
+    args = parse_args()
+
+    async def configure(conn):
+        # Autocommit first, so the SET below does not leave a transaction open
+        await conn.set_autocommit(True)
+        await register_vector_async(conn)
+        await conn.execute(f"SET hnsw.ef_search = {int(args.ef_search)}")
+
+    # Load dataset
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    vectors = np.array([item["vector"] for item in data], dtype=np.float32)
+    query_vectors = [vectors[i % len(vectors)] for i in range(args.queries)]
+
+    print(f"Connecting to PostgreSQL with a pool of {args.connections} connections...")
+    async with AsyncConnectionPool(DSN, min_size=args.connections, max_size=args.connections,
+                                   configure=configure, open=False) as pool:
+        await pool.open(wait=True)
+
+        # 1. Pipelined KNN queries
+        print(f"\n--- Running {args.queries} KNN queries (pipeline depth {args.pipeline_depth}) ---")
+        start = time.perf_counter()
+        results = await run_queries(pool, query_vectors, args.k, args.pipeline_depth)
+        elapsed = time.perf_counter() - start
+        print(f"Completed {len(results)} queries in {elapsed:.2f}s ({len(results) / elapsed:.0f} QPS)")
+
+        print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
+        for row in results[0]:
+            # embedding is already a numpy array decoded from the binary result
+            print(f"ID: {row[0]}, Distance: {row[4]:.4f}, Text: {row[1]}, "
+                  f"Vector: {type(row[3]).__name__}{row[3].shape}")
+
+        # 2. Pipelined point updates
+        print("\n--- Updating Metadata ---")
+        updates = [(item["id"], {"touched": True}) for item in data]
+        start = time.perf_counter()
+        await update_metadata(pool, updates, args.connections)
+        print(f"Updated {len(updates)} rows in {time.perf_counter() - start:.3f}s")
+
+def main():
+    asyncio.run(main_async())
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,213 @@
 import psycopg2
+from psycopg2.extras import execute_values
 from pgvector.psycopg2 import register_vector
+import argparse
 import json
 import numpy as np
 import os
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="pgvector example")
+    parser.add_argument("--index", choices=["hnsw", "ivfflat", "none"], default="hnsw",
+                        help="ANN index type built after the data is loaded")
+    parser.add_argument("--quantization", choices=["none", "halfvec", "binary"], default="none",
+                        help="Index a halfvec or binary-quantized expression instead of the full vector")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW candidate list size at build")
+    parser.add_argument("--ef-search", type=int, default=40, help="HNSW candidate list size at query time")
+    parser.add_argument("--lists", type=int, default=None, help="IVFFlat lists (default: rows / 1000, min 1)")
+    parser.add_argument("--probes", type=int, default=1, help="IVFFlat lists probed at query time")
+    parser.add_argument("--rerank", type=int, default=40,
+                        help="Candidates fetched from a quantized index before exact re-ranking")
+    parser.add_argument("--maintenance-work-mem", default="1GB",
+                        help="maintenance_work_mem for the index build (graph should fit in memory)")
+    parser.add_argument("--parallel-workers", type=int, default=7,
+                        help="max_parallel_maintenance_workers for the index build")
+    parser.add_argument("--metadata-index", choices=["gin", "btree", "none"], default="btree",
+                        help="GIN (jsonb_path_ops) index on metadata or B-tree expression indexes per key")
+    parser.add_argument("--metadata-keys", nargs="+", default=["category"],
+                        help="Metadata keys that get a B-tree expression index")
+    parser.add_argument("--iterative-scan", choices=["off", "relaxed_order", "strict_order"], default="relaxed_order",
+                        help="Keep scanning the ANN index until enough rows pass the filter (pgvector 0.8+)")
+    parser.add_argument("--max-scan-tuples", type=int, default=20000,
+                        help="Upper bound on tuples visited by an iterative HNSW scan")
+    parser.add_argument("--exact-threshold", type=int, default=10000,
+                        help="Use an exact scan when the planner estimates at most this many rows match the filter")
+    parser.add_argument("--partition-by-category", action="store_true",
+                        help="LIST-partition the table on metadata->>'category'")
+    return parser.parse_args()
+
+def create_table(cur, args, dim, categories):
+    if not args.partition_by_category:
+        cur.execute(f"""
+            CREATE TABLE items (
+                id SERIAL PRIMARY KEY,
+                text TEXT,
+                metadata JSONB,
+                embedding VECTOR({dim})
+            )
+        """)
+        return
+
+    # A primary key must contain the partition key, which cannot be an expression,
+    # so the partitioned table uses a plain index on id instead.
+    cur.execute(f"""
+        CREATE TABLE items (
+            id INTEGER NOT NULL,
+            text TEXT,
+            metadata JSONB,
+            embedding VECTOR({dim})
+        ) PARTITION BY LIST ((metadata->>'category'))
+    """)
+    for i, category in enumerate(sorted(categories)):
+        cur.execute(f"CREATE TABLE items_p{i} PARTITION OF items FOR VALUES IN (%s)", (category,))
+    cur.execute("CREATE TABLE items_default PARTITION OF items DEFAULT")
+    cur.execute("CREATE INDEX ON items (id)")
+
+def build_metadata_index(cur, args):
+    if args.metadata_index == "gin":
+        cur.execute("CREATE INDEX items_metadata_gin_idx ON items USING gin (metadata jsonb_path_ops)")
+        print("GIN index on metadata created.")
+    elif args.metadata_index == "btree":
+        for key in args.metadata_keys:
+            cur.execute(f"CREATE INDEX items_metadata_{key}_idx ON items ((metadata->>%s))", (key,))
+        print(f"B-tree indexes created on metadata keys: {', '.join(args.metadata_keys)}")
+
+def filter_clause(args, filters):
+    # The predicate has to match the shape of the metadata index to be usable:
+    # containment (@>) for GIN, ->> equality for the B-tree expression indexes.
+    if args.metadata_index == "gin":
+        return "metadata @> %(filter)s::jsonb", {"filter": json.dumps(filters)}
+
+    clauses = []
+    params = {}
+    for i, (key, value) in enumerate(filters.items()):
+        clauses.append(f"metadata->>%(key{i})s = %(value{i})s")
+        params[f"key{i}"] = key
+        params[f"value{i}"] = str(value)
+    return " AND ".join(clauses), params
+
+def estimate_rows(cur, where, params):
+    # Planner estimate, cheap compared to counting the matching rows
+    cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM items WHERE {where}", params)
+    return cur.fetchone()[0][0]["Plan"]["Plan Rows"]
+
+def build_index(cur, args, dim, num_rows):
+    # Build the index after loading so the graph is constructed in one pass
+    # instead of being updated row by row.
+    if args.index == "none":
+        return None
+
+    cur.execute("SET maintenance_work_mem = %s", (args.maintenance_work_mem,))
+    cur.execute("SET max_parallel_maintenance_workers = %s", (args.parallel_workers,))
+
+    # Column/expression and operator class depend on the storage chosen for the index
+    if args.quantization == "halfvec":
+        target = f"(embedding::halfvec({dim})) halfvec_cosine_ops"
+    elif args.quantization == "binary":
+        if args.index != "hnsw":
+            raise ValueError("binary quantization requires an HNSW index")
+        target = f"(binary_quantize(embedding)::bit({dim})) bit_hamming_ops"
+    else:
+        target = "embedding vector_cosine_ops"
+
+    if args.index == "hnsw":
+        options = f"m = {args.m}, ef_construction = {args.ef_construction}"
+    else:
+        lists = args.lists or max(1, num_rows // 1000)
+        options = f"lists = {lists}"
+
+    index_name = f"items_embedding_{args.index}_idx"
+    start = time.perf_counter()
+    cur.execute(f"CREATE INDEX {index_name} ON items USING {args.index} ({target}) WITH ({options})")
+    elapsed = time.perf_counter() - start
+
+    # pg_partition_tree also covers the per-partition indexes of a partitioned table
+    cur.execute(
+        "SELECT pg_size_pretty(sum(pg_relation_size(relid))) FROM pg_partition_tree(%s::regclass)",
+        (index_name,)
+    )
+    print(f"Index '{index_name}' created in {elapsed:.2f}s, size: {cur.fetchone()[0]}")
+    return index_name
+
+def vector_search(cur, args, dim, query_vector, k=3, where=None, where_params=None):
+    # Per-session search settings
+    if args.index == "hnsw":
+        cur.execute("SET hnsw.ef_search = %s", (args.ef_search,))
+    elif args.index == "ivfflat":
+        cur.execute("SET ivfflat.probes = %s", (args.probes,))
+
+    params = {"q": query_vector, "candidates": max(args.rerank, k), "k": k}
+    params.update(where_params or {})
+    where_sql = f"WHERE {where}" if where else ""
+
+    if args.quantization == "halfvec":
+        order_by = f"embedding::halfvec({dim}) <=> %(q)s::vector::halfvec({dim})"
+    elif args.quantization == "binary":
+        # Hamming distance over the binary index
+        order_by = f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize(%(q)s::vector)"
+    else:
+        # Using <=> for cosine distance (or <-> for L2, <#> for negative inner product)
+        # vector_cosine_ops uses <=>
+        order_by = "embedding <=> %(q)s::vector"
+        params["candidates"] = k
+
+    # Candidates come from the index; the outer query re-ranks them with the full
+    # vector, which also restores exact order after a relaxed iterative scan.
+    cur.execute(f"""
+        SELECT id, text, metadata, 1 - (embedding <=> %(q)s::vector) as similarity
+        FROM (
+            SELECT id, text, metadata, embedding
+            FROM items
+            {where_sql}
+            ORDER BY {order_by}
+            LIMIT %(candidates)s
+        ) candidates
+        ORDER BY embedding <=> %(q)s::vector
+        LIMIT %(k)s
+    """, params)
+
+    return cur.fetchall()
+
+def filtered_vector_search(cur, args, dim, query_vector, filters, k=3):
+    where, params = filter_clause(args, filters)
+
+    estimated = estimate_rows(cur, where, params)
+    if args.index == "none" or estimated <= args.exact_threshold:
+        # Highly selective filter: scan the matching rows exactly via the metadata
+        # index. MATERIALIZED keeps the planner from switching to the ANN index.
+        print(f"Exact scan (~{estimated:.0f} matching rows)")
+        params["q"] = query_vector
+        params["k"] = k
+        cur.execute(f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT id, text, metadata, embedding FROM items WHERE {where}
+            )
+            SELECT id, text, metadata, 1 - (embedding <=> %(q)s::vector) as similarity
+            FROM filtered
+            ORDER BY embedding <=> %(q)s::vector
+            LIMIT %(k)s
+        """, params)
+        return cur.fetchall()
+
+    # Iterative index scan so the filter does not leave fewer than k results
+    print(f"Iterative {args.index} scan (~{estimated:.0f} matching rows)")
+    if args.index == "hnsw":
+        cur.execute("SET hnsw.iterative_scan = %s", (args.iterative_scan,))
+        cur.execute("SET hnsw.max_scan_tuples = %s", (args.max_scan_tuples,))
+    else:
+        cur.execute("SET ivfflat.iterative_scan = %s", (args.iterative_scan,))
+    try:
+        return vector_search(cur, args, dim, query_vector, k=k, where=where, where_params=params)
+    finally:
+        cur.execute(f"RESET {args.index}.iterative_scan")
+        if args.index == "hnsw":
+            cur.execute("RESET hnsw.max_scan_tuples")
 
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to PostgreSQL...")
     conn = psycopg2.connect(
@@ -21,74 +224,71 @@ def main():
 
     cur = conn.cursor()
 
+    # Load dataset
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    dim = len(data[0]["vector"])
+
     # 1. Setup Table and Extension
     cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
     cur.execute("DROP TABLE IF EXISTS items")
 
     # Create table with vector column
-    # Use 384 dimensions for all-MiniLM-L6-v2
-    cur.execute("""
-        CREATE TABLE items (
-            id SERIAL PRIMARY KEY,
-            text TEXT,
-            metadata JSONB,
-            embedding VECTOR(384)
-        )
-    """)
+    # Dimension taken from the dataset (384 for all-MiniLM-L6-v2)
+    categories = {item["metadata"]["category"] for item in data}
+    create_table(cur, args, dim, categories)
     print("Table created.")
 
-    # Load dataset
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
-    with open(data_path, 'r') as f:
-        data = json.load(f)
-
-    # 2. Insert Data
+    # 2. Insert Data (bulk load before any index exists)
     print(f"Inserting {len(data)} items...")
-    for item in data:
-        cur.execute(
-            "INSERT INTO items (id, text, metadata, embedding) VALUES (%s, %s, %s, %s)",
-            (item["id"], item["text"], json.dumps(item["metadata"]), item["vector"])
-        )
-
-    # Create Index (IVFFlat)
-    # Requires enough rows to be useful, but demonstrating syntax
-    # cur.execute("CREATE INDEX ON items USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)")
-    # For small dataset, HNSW is also good or just no index (exact search)
-    # Using HNSW:
-    cur.execute("CREATE INDEX ON items USING hnsw (embedding vector_cosine_ops)")
-    print("Index created.")
+    start = time.perf_counter()
+    execute_values(
+        cur,
+        "INSERT INTO items (id, text, metadata, embedding) VALUES %s",
+        [
+            (item["id"], item["text"], json.dumps(item["metadata"]), np.array(item["vector"], dtype=np.float32))
+            for item in data
+        ],
+        page_size=1000
+    )
+    print(f"Data loaded in {time.perf_counter() - start:.2f}s.")
+
+    # Create Indexes
+    build_index(cur, args, dim, len(data))
+    build_metadata_index(cur, args)
+    cur.execute("ANALYZE items")
 
     # 3. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
-    query_vector = data[0]["vector"]
+    query_vector = np.array(data[0]["vector"], dtype=np.float32)
 
-    # Using <=> for cosine distance (or <-> for L2, <#> for negative inner product)
-    # vector_cosine_ops uses <=>
-    cur.execute("""
-        SELECT id, text, metadata, 1 - (embedding <=> %s) as similarity
-        FROM items
-        ORDER BY embedding <=> %s
-        LIMIT 3
-    """, (query_vector, query_vector))
-
-    rows = cur.fetchall()
+    rows = vector_search(cur, args, dim, query_vector, k=3)
     for row in rows:
         print(f"ID: {row[0]}, Similarity: {row[3]:.4f}, Text: {row[1]}, Metadata: {row[2]}")
 
     # 4. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
-    # Using JSONB operator ->>
-    cur.execute("""
+    # Predicate shaped to use the metadata index
+    where, params = filter_clause(args, {"category": "tech"})
+    cur.execute(f"""
         SELECT id, text, metadata
         FROM items
-        WHERE metadata->>'category' = 'tech'
-    """)
+        WHERE {where}
+    """, params)
 
     rows = cur.fetchall()
     for row in rows:
         print(f"ID: {row[0]}, Text: {row[1]}, Metadata: {row[2]}")
 
+    # Filtered Vector Search
+    print("\n--- Filtered Vector Search Results (Top 3 with Category == 'tech') ---")
+    rows = filtered_vector_search(cur, args, dim, query_vector, {"category": "tech"}, k=3)
+    for row in rows:
+        print(f"ID: {row[0]}, Similarity: {row[3]:.4f}, Text: {row[1]}, Metadata: {row[2]}")
+
     # 5. Update Metadata
     print("\n--- Updating Metadata ---")
     item_id = data[0]["id"]
@@ -1,16 +1,63 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+import argparse
 import json
+import numpy as np
 import os
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Qdrant example")
+    parser.add_argument("--quantization", choices=["none", "scalar", "binary"], default="none",
+                        help="Keep int8 or 1-bit copies of the vectors in RAM, originals on disk")
+    parser.add_argument("--oversampling", type=float, default=2.0, help="Quantized candidates per result before rescoring")
+    parser.add_argument("--no-rescore", action="store_true", help="Return quantized scores without rescoring")
+    parser.add_argument("--hnsw-ef", type=int, default=128, help="HNSW candidate list size at query time")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points per upload request")
+    parser.add_argument("--parallel", type=int, default=2, help="Upload worker processes")
+    parser.add_argument("--rest", action="store_true", help="Use REST instead of gRPC")
+    parser.add_argument("--local", default=None, metavar="PATH",
+                        help="Embedded local mode: a storage path or ':memory:' instead of the Docker server")
+    return parser.parse_args()
+
+def connect(args):
+    if args.local == ":memory:":
+        return QdrantClient(location=":memory:")
+    if args.local:
+        # Local mode runs in this process; quantization and payload indexes are
+        # accepted but have no effect there
+        return QdrantClient(path=args.local)
+    # gRPC is used for uploads and searches unless --rest is given
+    return QdrantClient(host="localhost", port=6333, grpc_port=6334, prefer_grpc=not args.rest)
+
+def quantization_config(args):
+    if args.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if args.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+def search_params(args):
+    quantization = None
+    if args.quantization != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=not args.no_rescore,
+            oversampling=args.oversampling
+        )
+    return models.SearchParams(hnsw_ef=args.hnsw_ef, quantization=quantization)
 
 def main():
+    args = parse_args()
+
     # 1. Connect
-    print("Connecting to Qdrant...")
-    client = QdrantClient(host="localhost", port=6333)
+    print(f"Connecting to Qdrant ({args.local or 'server'})...")
+    client = connect(args)
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         dataset = json.load(f)
 
@@ -25,28 +72,43 @@ def main():
 
     client.create_collection(
         collection_name=collection_name,
-        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
+        vectors_config=models.VectorParams(
+            size=dim,
+            distance=models.Distance.COSINE,
+            # With quantization the full vectors are only read for rescoring
+            on_disk=args.quantization != "none"
+        ),
+        quantization_config=quantization_config(args)
+    )
+    # Keyword index so category filters do not scan payloads
+    client.create_payload_index(
+        collection_name=collection_name,
+        field_name="category",
+        field_schema=models.PayloadSchemaType.KEYWORD,
+        wait=True
     )
-    print(f"Created collection '{collection_name}' with dimension {dim}.")
+    print(f"Created collection '{collection_name}' with dimension {dim} (quantization: {args.quantization}).")
 
     # 3. Insert Points
-    points = []
-    for item in dataset:
-        points.append(models.PointStruct(
-            id=item["id"],
-            vector=item["vector"],
-            payload={
-                "text": item["text"],
-                "category": item["metadata"]["category"]
-            }
-        ))
-
-    operation_info = client.upsert(
+    # Vectors go straight from a numpy matrix; payloads and ids are streamed
+    vectors = np.array([item["vector"] for item in dataset], dtype=np.float32)
+    payloads = (
+        {"text": item["text"], "category": item["metadata"]["category"]}
+        for item in dataset
+    )
+    ids = (item["id"] for item in dataset)
+
+    start = time.perf_counter()
+    client.upload_collection(
         collection_name=collection_name,
-        wait=True,
-        points=points
+        vectors=vectors,
+        payload=payloads,
+        ids=ids,
+        batch_size=args.batch_size,
+        parallel=args.parallel,
+        wait=True
     )
-    print(f"Upsert status: {operation_info.status}")
+    print(f"Uploaded {len(vectors)} points in {time.perf_counter() - start:.2f}s.")
 
     # 4. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
@@ -55,6 +117,7 @@ def main():
     search_result = client.search(
         collection_name=collection_name,
         query_vector=query_vector,
+        search_params=search_params(args),
         limit=3
     )
 
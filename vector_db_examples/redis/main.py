@@ -1,19 +1,65 @@
 import redis
 import numpy as np
+import argparse
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from redis.commands.search.field import TextField, TagField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Redis vector search example")
+    parser.add_argument("--algorithm", choices=["FLAT", "HNSW"], default="HNSW")
+    parser.add_argument("--type", choices=["FLOAT32", "FLOAT16", "BFLOAT16"], default="FLOAT32",
+                        help="Stored vector type; 16-bit types halve the memory per vector")
+    parser.add_argument("--m", type=int, default=16, help="HNSW max outgoing edges per node")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-runtime", type=int, default=10, help="HNSW candidate list size at query time")
+    parser.add_argument("--initial-cap", type=int, default=None,
+                        help="Pre-allocated index capacity (default: dataset size)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Commands per pipeline round trip")
+    parser.add_argument("--connections", type=int, default=4, help="Parallel connections used for loading")
+    return parser.parse_args()
+
+def vector_bytes(vector, vector_type):
+    # Encode a vector in the byte layout of the index's TYPE
+    vector = np.asarray(vector, dtype=np.float32)
+    if vector_type == "FLOAT16":
+        return vector.astype(np.float16).tobytes()
+    if vector_type == "BFLOAT16":
+        # bfloat16 is the upper half of a float32, rounded to nearest even
+        bits = vector.view(np.uint32)
+        bits = bits + 0x7FFF + ((bits >> 16) & 1)
+        return (bits >> 16).astype(np.uint16).tobytes()
+    return vector.tobytes()
+
+def load_batch(pool, batch, prefix, vector_type):
+    # Non-transactional pipeline: commands are only buffered and sent together,
+    # without MULTI/EXEC blocking the server for the whole batch.
+    r = redis.Redis(connection_pool=pool)
+    pipeline = r.pipeline(transaction=False)
+    for item in batch:
+        pipeline.hset(f"{prefix}{item['id']}", mapping={
+            "text": item["text"],
+            "category": item["metadata"]["category"],
+            "vector": vector_bytes(item["vector"], vector_type)
+        })
+    pipeline.execute()
+    return len(batch)
+
 def main():
+    args = parse_args()
+
     # Connect
     print("Connecting to Redis...")
-    r = redis.Redis(host='localhost', port=6379, decode_responses=False)
+    pool = redis.ConnectionPool(host='localhost', port=6379, max_connections=args.connections + 1)
+    r = redis.Redis(connection_pool=pool)
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -32,41 +78,44 @@ def main():
 
     # Define schema
     # Note: VectorField arguments depend on algorithm (FLAT or HNSW)
+    attributes = {
+        "TYPE": args.type,
+        "DIM": dim,
+        "DISTANCE_METRIC": "COSINE",
+        # Sizing the index up front avoids repeated re-allocation while loading
+        "INITIAL_CAP": args.initial_cap or len(data)
+    }
+    if args.algorithm == "HNSW":
+        attributes.update({
+            "M": args.m,
+            "EF_CONSTRUCTION": args.ef_construction,
+            "EF_RUNTIME": args.ef_runtime
+        })
     schema = (
         TextField("text"),
         TagField("category"),
-        VectorField("vector",
-            "FLAT", {
-                "TYPE": "FLOAT32",
-                "DIM": dim,
-                "DISTANCE_METRIC": "COSINE"
-            }
-        )
+        VectorField("vector", args.algorithm, attributes)
     )
 
     definition = IndexDefinition(prefix=[prefix], index_type=IndexType.HASH)
 
     r.ft(index_name).create_index(schema, definition=definition)
-    print(f"Index '{index_name}' created.")
+    print(f"Index '{index_name}' created ({args.algorithm}, {args.type}).")
 
     # 2. Add Data
+    # Bounded pipelines keep client memory flat and let the server interleave
+    # other commands; batches are sent from several connections in parallel.
     print(f"Adding {len(data)} items...")
-    pipeline = r.pipeline()
-    for item in data:
-        key = f"{prefix}{item['id']}"
-        vector = np.array(item["vector"], dtype=np.float32).tobytes()
-
-        pipeline.hset(key, mapping={
-            "text": item["text"],
-            "category": item["metadata"]["category"],
-            "vector": vector
-        })
-    pipeline.execute()
-    print("Data added.")
+    batches = [data[i:i + args.batch_size] for i in range(0, len(data), args.batch_size)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.connections) as executor:
+        added = sum(executor.map(lambda batch: load_batch(pool, batch, prefix, args.type), batches))
+    elapsed = time.perf_counter() - start
+    print(f"Data added: {added} items in {elapsed:.2f}s.")
 
     # 3. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
-    query_vector = np.array(data[0]["vector"], dtype=np.float32).tobytes()
+    query_vector = vector_bytes(data[0]["vector"], args.type)
 
     # Query: "*=>[KNN 3 @vector $vec AS score]"
     q = Query("*=>[KNN 3 @vector $vec AS score]")\
@@ -1,26 +1,123 @@
 import grpc
+import argparse
 import json
 import os
+import threading
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 # Assuming vald-client-python is installed and generated correctly
 try:
-    from vald.v1.vald import vald_pb2_grpc
+    from vald.v1.vald import vald_pb2_grpc, index_pb2_grpc
+    from vald.v1.agent.core import agent_pb2_grpc
     from vald.v1.payload import payload_pb2
 except ImportError:
     print("Vald client libraries not found. Please install vald-client-python.")
     exit(1)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vald example")
+    parser.add_argument("--host", default="localhost:8081")
+    parser.add_argument("--channels", type=int, default=4, help="gRPC channels in the pool")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Unacknowledged stream requests per channel")
+    parser.add_argument("--multi-batch", type=int, default=100, help="Queries per MultiSearch request")
+    parser.add_argument("--pool-size", type=int, default=10000, help="CreateIndex pool size")
+    parser.add_argument("--index-timeout", type=float, default=60.0, help="Seconds to wait for indexing")
+    return parser.parse_args()
+
+def bounded(requests, window):
+    # Flow control: stop producing once max_in_flight requests are unacknowledged
+    for request in requests:
+        window.acquire()
+        yield request
+
+def stream_insert(stub, items, max_in_flight):
+    window = threading.Semaphore(max_in_flight)
+    requests = (
+        payload_pb2.Insert.Request(
+            vector=payload_pb2.Object.Vector(id=str(item["id"]), vector=item["vector"]),
+            config=payload_pb2.Insert.Config(skip_strict_exist_check=True)
+        )
+        for item in items
+    )
+    inserted = 0
+    errors = 0
+    for response in stub.StreamInsert(bounded(requests, window)):
+        window.release()
+        if response.HasField("status"):
+            errors += 1
+        else:
+            inserted += 1
+    return inserted, errors
+
+def stream_search(stub, query_vectors, config, max_in_flight):
+    window = threading.Semaphore(max_in_flight)
+    requests = (payload_pb2.Search.Request(vector=vector, config=config) for vector in query_vectors)
+    results = []
+    for response in stub.StreamSearch(bounded(requests, window)):
+        window.release()
+        results.append(response.response.results if response.HasField("response") else None)
+    return results
+
+def multi_search(stub, query_vectors, config, batch_size):
+    results = []
+    for i in range(0, len(query_vectors), batch_size):
+        request = payload_pb2.Search.MultiRequest(requests=[
+            payload_pb2.Search.Request(vector=vector, config=config)
+            for vector in query_vectors[i:i + batch_size]
+        ])
+        results.extend(response.results for response in stub.MultiSearch(request).responses)
+    return results
+
+def fan_out(search, stubs, query_vectors, *args):
+    # Round-robin shards of the queries, one per channel, searched concurrently;
+    # results are put back in query order
+    n = len(stubs)
+    shards = [query_vectors[i::n] for i in range(n)]
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        parts = list(executor.map(lambda s, q: search(s, q, *args), stubs, shards))
+    results = [None] * len(query_vectors)
+    for i, part in enumerate(parts):
+        results[i::n] = part
+    return results
+
+def wait_until_indexed(channel, expected, pool_size, timeout):
+    # Build the NGT index now instead of waiting for the auto-index interval,
+    # then poll the agent until every vector is committed to the index
+    agent = agent_pb2_grpc.AgentStub(channel)
+    index = index_pb2_grpc.IndexStub(channel)
+    start = time.perf_counter()
+    try:
+        agent.CreateIndex(payload_pb2.Control.CreateIndexRequest(pool_size=pool_size))
+    except grpc.RpcError as e:
+        # Nothing uncommitted: the auto-indexer got there first, or every
+        # insert was rejected as already existing
+        if e.code() != grpc.StatusCode.FAILED_PRECONDITION:
+            raise
+    while True:
+        info = index.IndexInfo(payload_pb2.Empty())
+        if info.stored >= expected and info.uncommitted == 0 and not info.indexing:
+            return time.perf_counter() - start
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Index not ready: stored={info.stored}, uncommitted={info.uncommitted}")
+        time.sleep(0.1)
+
 def main():
-    host = 'localhost:8081'
+    args = parse_args()
+    host = args.host
     print(f"Connecting to Vald at {host}...")
 
-    channel = grpc.insecure_channel(host)
-    stub = vald_pb2_grpc.ValdStub(channel)
+    # Channel pool: each channel is its own HTTP/2 connection
+    options = [("grpc.max_send_message_length", 64 * 1024 * 1024),
+               ("grpc.max_receive_message_length", 64 * 1024 * 1024)]
+    channels = [grpc.insecure_channel(host, options=options) for _ in range(args.channels)]
+    stubs = [vald_pb2_grpc.ValdStub(channel) for channel in channels]
+    stub = stubs[0]
 
     # Load dataset
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
     with open(data_path, 'r') as f:
         data = json.load(f)
 
@@ -29,28 +126,26 @@ def main():
     # 1. Insert Data
     print(f"Inserting {len(data)} items...")
 
-    # Vald Insert is usually stream or unary
-    # We use Insert (unary) in loop or StreamInsert
-
-    for item in data:
-        vec = payload_pb2.Object.Vector(id=str(item["id"]), vector=item["vector"])
-        # Metadata handling in Vald is via 'ips' (Ingress/Egress filter) or external.
-        # Vald core is vector index.
-        # But for this example, we just index the vector and ID.
-        # We can simulate metadata by storing it elsewhere or using ID to look up.
-        # The table says "Metadata Support: Distributed". This might refer to Vald's architecture.
-        # Vald Filter Gateway supports metadata filtering.
-        # We are using Vald Agent NGT directly here (standalone).
-        # Standalone might not support metadata filtering fully.
-
-        req = payload_pb2.Insert.Request(vector=vec, config=payload_pb2.Insert.Config(skip_strict_exist_check=True))
-        stub.Insert(req)
-
-    print("Data inserted.")
-
-    # Wait for indexing (Vald is eventually consistent / auto-commit)
-    import time
-    time.sleep(5)
+    # Metadata handling in Vald is via 'ips' (Ingress/Egress filter) or external.
+    # Vald core is vector index.
+    # But for this example, we just index the vector and ID.
+    # Vald Filter Gateway supports metadata filtering.
+    # We are using Vald Agent NGT directly here (standalone).
+
+    # One StreamInsert per channel, each over its share of the data
+    shards = [data[i::len(stubs)] for i in range(len(stubs))]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(stubs)) as executor:
+        counts = list(executor.map(stream_insert, stubs, shards, [args.max_in_flight] * len(stubs)))
+    insert_time = time.perf_counter() - start
+    inserted = sum(c[0] for c in counts)
+    errors = sum(c[1] for c in counts)
+    print(f"Data inserted: {inserted} vectors ({errors} errors) in {insert_time:.2f}s "
+          f"({inserted / insert_time:.0f} vectors/s).")
+
+    # Wait for indexing: explicit CreateIndex, then poll the agent's index info
+    index_time = wait_until_indexed(channels[0], inserted, args.pool_size, args.index_timeout)
+    print(f"Index ready {index_time:.2f}s after insert (time to searchable: {insert_time + index_time:.2f}s).")
 
     # 2. Search (Vector Search)
     print("\n--- Vector Search Results (Top 3 similar to item 1) ---")
@@ -69,6 +164,22 @@ def main():
     except grpc.RpcError as e:
         print(f"Search failed: {e}")
 
+    # Batched searches: MultiSearch (one request per batch) and StreamSearch,
+    # spread over every channel in the pool
+    query_vectors = [item["vector"] for item in data]
+    try:
+        start = time.perf_counter()
+        results = fan_out(multi_search, stubs, query_vectors, cfg, args.multi_batch)
+        elapsed = time.perf_counter() - start
+        print(f"MultiSearch: {len(results)} queries in {elapsed:.3f}s")
+
+        start = time.perf_counter()
+        results = fan_out(stream_search, stubs, query_vectors, cfg, args.max_in_flight)
+        elapsed = time.perf_counter() - start
+        print(f"StreamSearch: {len(results)} queries in {elapsed:.3f}s")
+    except grpc.RpcError as e:
+        print(f"Batched search failed: {e}")
+
     # 3. Metadata Search (Not natively supported in standalone agent without gateway filters)
     print("\n--- Metadata Search Results ---")
     print("Metadata search in Vald usually requires Vald Gateway with Filter or external metadata store.")
@@ -101,5 +212,8 @@ def main():
     except grpc.RpcError as e:
         print(f"Remove failed: {e}")
 
+    for channel in channels:
+        channel.close()
+
 if __name__ == "__main__":
     main()
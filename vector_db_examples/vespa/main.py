@@ -1,21 +1,45 @@
-from vespa.package import ApplicationPackage, Field, Schema, Document, RankProfile, HNSW
+from vespa.package import ApplicationPackage, Field, Schema, Document, RankProfile, HNSW, SecondPhaseRanking
 from vespa.deployment import VespaDocker
+import argparse
 import json
+import numpy as np
 import os
 import requests
+import shutil
+import threading
 import time
 
+CONFIG_SERVER = "http://localhost:19071"
+CONTAINER = "http://localhost:8080"
 
-def main():
-    # 1. Define Application Package
-    # Schema: text (index, summary), category (attribute, summary), vector (attribute, index: hnsw)
-    document = Document(
-        fields=[
-            Field(name="text", type="string", indexing=["index", "summary"]),
-            Field(name="category", type="string", indexing=["attribute", "summary"]),
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vespa example")
+    parser.add_argument("--feed", choices=["async", "sync"], default="async",
+                        help="feed_async_iterable (HTTP/2, asyncio) or feed_iterable (thread pool)")
+    parser.add_argument("--max-connections", type=int, default=4, help="HTTP connections to the container")
+    parser.add_argument("--max-workers", type=int, default=64, help="Max in-flight feed operations")
+    parser.add_argument("--max-queue-size", type=int, default=1000, help="Queued operations for feed_iterable")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Seconds to wait for Vespa to come up")
+    parser.add_argument("--binarize", action="store_true",
+                        help="Retrieve with a packed int8 hamming HNSW field and re-rank with the float vector")
+    parser.add_argument("--rerank-count", type=int, default=100, help="Hits re-scored in the second phase")
+    parser.add_argument("--target-hits", type=int, default=100, help="nearestNeighbor targetHits for binary retrieval")
+    return parser.parse_args()
+
+
+def binarize(vector):
+    # Same as the binarize | pack_bits indexing: sign bit per dimension, MSB first
+    bits = np.packbits(np.asarray(vector) > 0)
+    return bits.view(np.int8).tolist()
+
+
+def vector_fields(args, dim):
+    if not args.binarize:
+        return [
             Field(
                 name="vector",
-                type="tensor<float>(x[384])",
+                type=f"tensor<float>(x[{dim}])",
                 indexing=["attribute", "index"],
                 ann=HNSW(
                     distance_metric="euclidean",
@@ -23,20 +47,172 @@ def main():
                     neighbors_to_explore_at_insert=200
                 )
             )
-        ]
+        ], []
+
+    # Float vector is only read for re-ranking: paged attribute, no HNSW graph.
+    # The binarized copy is derived at indexing time outside the document.
+    document_fields = [
+        Field(
+            name="vector",
+            type=f"tensor<float>(x[{dim}])",
+            indexing=["attribute"],
+            attribute=["paged"]
+        )
+    ]
+    synthetic_fields = [
+        Field(
+            name="vector_binary",
+            type=f"tensor<int8>(x[{(dim + 7) // 8}])",
+            indexing=["input vector", "binarize", "pack_bits", "attribute", "index"],
+            ann=HNSW(
+                distance_metric="hamming",
+                max_links_per_node=16,
+                neighbors_to_explore_at_insert=200
+            ),
+            is_document_field=False
+        )
+    ]
+    return document_fields, synthetic_fields
+
+
+def rank_profiles(args, dim):
+    profiles = [
+        RankProfile(
+            name="default",
+            inputs=[("query(query_vector)", f"tensor<float>(x[{dim}])")],
+            first_phase="closeness(field, vector)"
+        )
+    ]
+    if args.binarize:
+        profiles.append(RankProfile(
+            name="binary",
+            inputs=[
+                ("query(query_vector)", f"tensor<float>(x[{dim}])"),
+                ("query(query_binary)", f"tensor<int8>(x[{(dim + 7) // 8}])")
+            ],
+            first_phase="closeness(field, vector_binary)",
+            second_phase=SecondPhaseRanking(
+                expression="1 / (1 + euclidean_distance(query(query_vector), attribute(vector), x))",
+                rerank_count=args.rerank_count
+            )
+        ))
+    return profiles
+
+
+def build_schema(args, dim):
+    # Schema: text (index, summary), category (attribute, summary), vector (attribute, index: hnsw)
+    # With --binarize: vector (paged attribute) plus vector_binary (hamming hnsw)
+    document_vector_fields, synthetic_fields = vector_fields(args, dim)
+    document = Document(
+        fields=[
+            Field(name="text", type="string", indexing=["index", "summary"]),
+            Field(name="category", type="string", indexing=["attribute", "summary"]),
+        ] + document_vector_fields
     )
 
     schema = Schema(
         name="doc",
         document=document,
-        rank_profiles=[
-            RankProfile(
-                name="default",
-                first_phase="closeness(field, vector)"
-            )
-        ]
+        rank_profiles=rank_profiles(args, dim)
     )
+    # Schema() has no argument for fields outside the document; added here,
+    # they are rendered after the document block
+    schema.add_fields(*synthetic_fields)
+    return schema
+
+
+def wait_for_health(url, timeout):
+    # /state/v1/health reports {"status": {"code": "up"}} once the service is serving
+    start = time.perf_counter()
+    while True:
+        try:
+            response = requests.get(f"{url}/state/v1/health", timeout=2)
+            if response.ok and response.json()["status"]["code"] == "up":
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{url} not healthy after {timeout:.0f}s")
+        time.sleep(0.5)
+
+
+def wait_for_convergence(timeout):
+    # The config server reports when every service runs the deployed config generation
+    start = time.perf_counter()
+    url = f"{CONFIG_SERVER}/application/v2/tenant/default/application/default/environment/prod/region/default/instance/default/serviceconverge"
+    while True:
+        try:
+            response = requests.get(url, timeout=5)
+            if response.ok and response.json().get("converged"):
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Services did not converge after {timeout:.0f}s")
+        time.sleep(0.5)
+
+
+def documents(data):
+    # Generator: documents are produced as the feeder consumes them
+    for item in data:
+        yield {
+            "id": str(item["id"]),
+            "fields": {
+                "text": item["text"],
+                "category": item["metadata"]["category"],
+                "vector": item["vector"]
+            }
+        }
 
+
+def feed(app, data, args):
+    stats = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def callback(response, doc_id):
+        # Called once per document, from the feeder's worker threads
+        ok = response.is_successful()
+        with lock:
+            stats["ok" if ok else "failed"] += 1
+        if not ok:
+            print(f"Failed to feed {doc_id}: {response.get_json()}")
+
+    start = time.perf_counter()
+    if args.feed == "async":
+        app.feed_async_iterable(
+            iter=documents(data),
+            schema="doc",
+            callback=callback,
+            max_connections=args.max_connections,
+            max_workers=args.max_workers
+        )
+    else:
+        app.feed_iterable(
+            iter=documents(data),
+            schema="doc",
+            callback=callback,
+            max_connections=args.max_connections,
+            max_workers=args.max_workers,
+            max_queue_size=args.max_queue_size
+        )
+    elapsed = time.perf_counter() - start
+    print(f"Fed {stats['ok']} documents ({stats['failed']} failed) in {elapsed:.2f}s "
+          f"({stats['ok'] / elapsed:.0f} docs/s).")
+
+
+def main():
+    args = parse_args()
+
+    # Load dataset
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    dim = len(data[0]["vector"])
+
+    # 1. Define Application Package
+    schema = build_schema(args, dim)
     app_package = ApplicationPackage(name="vectordb", schema=[schema])
 
     # 2. Deploy (Assuming Docker container is running at localhost:8080)
@@ -56,17 +232,8 @@ def main():
 
     # Wait for config server
     print("Waiting for Vespa Config Server...")
-    # time.sleep(10)
-
-    try:
-        # Deploy
-        # We need to zip the application package content
-        # pyvespa handles this?
-        # `VespaDocker` manages the container. Since we have external container, we can't use it easily?
-        # Actually `VespaDocker.deploy_from_disk`?
-        pass
-    except:
-        pass
+    elapsed = wait_for_health(CONFIG_SERVER, args.ready_timeout)
+    print(f"Config server up after {elapsed:.2f}s.")
 
     # For this example, we assume we can deploy via HTTP
     # We need to export package first
@@ -80,43 +247,25 @@ def main():
     shutil.make_archive("application", "zip", "application_package")
 
     print("Deploying application...")
+    start = time.perf_counter()
     with open("application.zip", "rb") as f:
         response = requests.post(
-            "http://localhost:19071/application/v2/tenant/default/application/default",
+            f"{CONFIG_SERVER}/application/v2/tenant/default/prepareandactivate",
             headers={"Content-Type": "application/zip"},
             data=f
         )
         print(response.json())
 
-    # Wait for application to be active
-    time.sleep(5)
+    # Wait for application to be active: config converged and container serving
+    wait_for_convergence(args.ready_timeout)
+    wait_for_health(CONTAINER, args.ready_timeout)
+    print(f"Application ready {time.perf_counter() - start:.2f}s after deploy.")
 
     app = Vespa(url="http://localhost", port=8080)
 
-    # Load dataset
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '../data/dataset.json')
-    with open(data_path, 'r') as f:
-        data = json.load(f)
-
     # 3. Feed Data
     print(f"Feeding {len(data)} items...")
-    documents = []
-    for item in data:
-        documents.append({
-            "id": str(item["id"]),
-            "fields": {
-                "text": item["text"],
-                "category": item["metadata"]["category"],
-                "vector": item["vector"]
-            }
-        })
-
-    # Feed batch
-    app.feed_batch(
-        schema="doc",
-        batch=documents
-    )
+    feed(app, data, args)
     print("Data fed.")
 
     # 4. Search (Vector Search)
@@ -140,6 +289,28 @@ def main():
         print(
             f"ID: {hit['id']}, Score: {hit['relevance']:.4f}, Text: {hit['fields']['text']}, Category: {hit['fields']['category']}")
 
+    if args.binarize:
+        # Hamming HNSW retrieval + float re-ranking; recall measured against the
+        # default profile, which is an exact search when vector has no HNSW index
+        print("\n--- Binary Retrieval + Float Re-ranking (Top 3 similar to item 1) ---")
+        binary_res = app.query(
+            yql=f"select * from sources * where {{targetHits:{args.target_hits}}}nearestNeighbor(vector_binary, query_binary) limit 3",
+            ranking="binary",
+            body={
+                "presentation.format": "json",
+                "input.query(query_vector)": query_vector,
+                "input.query(query_binary)": binarize(query_vector)
+            }
+        )
+
+        for hit in binary_res.hits:
+            print(
+                f"ID: {hit['id']}, Score: {hit['relevance']:.4f}, Text: {hit['fields']['text']}, Category: {hit['fields']['category']}")
+
+        expected = {hit['id'] for hit in res.hits}
+        found = {hit['id'] for hit in binary_res.hits}
+        print(f"Recall@3 vs default profile: {len(expected & found) / max(1, len(expected)):.2f}")
+
     # 5. Search with Metadata Filter
     print("\n--- Metadata Search Results (Category == 'tech') ---")
     # YQL filter
@@ -193,5 +364,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import shutil  # ensure imported
     main()
@@ -0,0 +1,32 @@
+import argparse
+import importlib.util
+import os
+import pytest
+
+pytest.importorskip("vespa.package")
+
+# Loaded by path: every example directory has a main.py
+spec = importlib.util.spec_from_file_location(
+    "vespa_main", os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+)
+vespa_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(vespa_main)
+
+def render(binarize, dim):
+    args = argparse.Namespace(binarize=binarize, rerank_count=100)
+    return vespa_main.build_schema(args, dim).schema_to_text
+
+def test_binarized_schema_has_synthetic_field():
+    text = render(True, 384)
+    assert "field vector_binary type tensor<int8>(x[48])" in text
+    assert "closeness(field, vector_binary)" in text
+    # Synthetic field sits outside the document block
+    assert text.index("field vector_binary") > text.index("field vector type")
+
+def test_binarized_size_rounds_up():
+    assert "field vector_binary type tensor<int8>(x[13])" in render(True, 100)
+
+def test_float_schema_has_no_binary_field():
+    text = render(False, 384)
+    assert "vector_binary" not in text
+    assert "field vector type tensor<float>(x[384])" in text
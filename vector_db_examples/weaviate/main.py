@@ -1,14 +1,54 @@
 import weaviate
+from weaviate.classes.config import Configure
+import argparse
 import json
 import os
 import time
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Weaviate example")
+    parser.add_argument("--batch-size", type=int, default=200, help="Objects per batch request")
+    parser.add_argument("--concurrent-requests", type=int, default=4, help="Batch requests in flight")
+    parser.add_argument("--ef", type=int, default=64, help="HNSW candidate list size at query time (-1 for dynamic)")
+    parser.add_argument("--ef-construction", type=int, default=128)
+    parser.add_argument("--max-connections", type=int, default=32)
+    parser.add_argument("--compression", choices=["none", "pq", "bq"], default="none",
+                        help="Product or binary quantization of the vectors held in memory")
+    parser.add_argument("--pq-segments", type=int, default=0, help="PQ segments (0 lets Weaviate choose)")
+    parser.add_argument("--pq-training-limit", type=int, default=100000)
+    parser.add_argument("--embedded", action="store_true",
+                        help="Start Embedded Weaviate in a child process instead of using the Docker server")
+    return parser.parse_args()
+
+def vector_index_config(args):
+    quantizer = None
+    if args.compression == "pq":
+        quantizer = Configure.VectorIndex.Quantizer.pq(
+            segments=args.pq_segments,
+            training_limit=args.pq_training_limit
+        )
+    elif args.compression == "bq":
+        quantizer = Configure.VectorIndex.Quantizer.bq()
+
+    return Configure.VectorIndex.hnsw(
+        ef=args.ef,
+        ef_construction=args.ef_construction,
+        max_connections=args.max_connections,
+        quantizer=quantizer
+    )
+
 def main():
+    args = parse_args()
+
     # Connect to Weaviate
-    client = weaviate.connect_to_local(
-        port=8080,
-        grpc_port=50051
-    )
+    if args.embedded:
+        # Downloads and runs the Weaviate binary locally; other ports avoid the Docker server
+        client = weaviate.connect_to_embedded(port=8079, grpc_port=50050)
+    else:
+        client = weaviate.connect_to_local(
+            port=8080,
+            grpc_port=50051
+        )
 
     try:
         # Check if connected
@@ -20,7 +60,7 @@ def main():
 
         # Load dataset
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(script_dir, '../data/dataset.json')
+        data_path = os.environ.get("DATASET_PATH", os.path.join(script_dir, '../data/dataset.json'))
         with open(data_path, 'r') as f:
             dataset = json.load(f)
 
@@ -39,13 +79,19 @@ def main():
                 weaviate.classes.config.Property(name="category", data_type=weaviate.classes.config.DataType.TEXT),
             ],
             vectorizer_config=weaviate.classes.config.Configure.Vectorizer.none(), # We provide vectors manually
+            vector_index_config=vector_index_config(args),
         )
-        print(f"Created collection '{collection_name}'.")
+        print(f"Created collection '{collection_name}' (compression: {args.compression}).")
 
         collection = client.collections.get(collection_name)
 
         # 2. Store Embeddings (Batch Insert)
-        with collection.batch.dynamic() as batch:
+        # Fixed-size batches with several requests in flight instead of dynamic sizing
+        start = time.perf_counter()
+        with collection.batch.fixed_size(
+            batch_size=args.batch_size,
+            concurrent_requests=args.concurrent_requests
+        ) as batch:
             for item in dataset:
                 batch.add_object(
                     properties={
@@ -61,15 +107,17 @@ def main():
             for failed in collection.batch.failed_objects:
                 print(failed)
         else:
-            print(f"Inserted {len(dataset)} objects.")
+            print(f"Inserted {len(dataset)} objects in {time.perf_counter() - start:.2f}s.")
 
         # 3. Perform Search (Vector Search)
         # Using the vector of the first item as a query vector to find similar items
         query_vector = dataset[0]["vector"]
 
+        # Queries go over gRPC; only the properties we print are returned
         response = collection.query.near_vector(
             near_vector=query_vector,
             limit=3,
+            return_properties=["text", "category"],
             return_metadata=weaviate.classes.query.MetadataQuery(distance=True)
         )
 